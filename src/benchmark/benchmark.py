@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks reprodutíveis dos motores de corte (sem desenho).
+
+  python src/benchmark/benchmark.py --saida antes.json
+  python src/benchmark/benchmark.py --saida depois.json
+  python src/benchmark/benchmark.py --comparar antes.json depois.json
+"""
+import sys, os, json, time, math, random, platform, argparse, tempfile, tracemalloc, subprocess
+from pathlib import Path
+from typing import List, Tuple, Dict, Callable
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "interface"))
+import app
+
+# --------------- conjuntos de peças (seed fixa) ---------------
+def _pequenas(r:random.Random, n:int)->List[Tuple[int,int]]:
+    return [(r.randint(20,80), r.randint(20,80)) for _ in range(n)]
+
+def _medias(r:random.Random, n:int)->List[Tuple[int,int]]:
+    return [(r.randint(20,150), r.randint(20,150)) for _ in range(n)]
+
+def _repetidas(r:random.Random, n:int)->List[Tuple[int,int]]:
+    tamanhos=[(r.randint(30,120), r.randint(30,120)) for _ in range(3)]
+    return [r.choice(tamanhos) for _ in range(n)]
+
+def _grandes(r:random.Random, n:int)->List[Tuple[int,int]]:
+    return [(r.randint(120,260), r.randint(120,260)) for _ in range(n)]
+
+def _tiras(r:random.Random, n:int)->List[Tuple[int,int]]:
+    out=[]
+    for _ in range(n):
+        fina,longa=r.randint(5,20), r.randint(100,280)
+        out.append((fina,longa) if r.random()<0.5 else (longa,fina))
+    return out
+
+CONJUNTOS:Dict[str,Callable[[random.Random,int],List[Tuple[int,int]]]]={
+    'pequenas':_pequenas, 'medias':_medias, 'repetidas':_repetidas, 'grandes':_grandes, 'tiras':_tiras,
+}
+
+def gerar(conjunto:str, n:int, seed:int)->List[Tuple[int,int]]:
+    return CONJUNTOS[conjunto](random.Random(f"{conjunto}:{n}:{seed}"), n)
+
+# --------------- medição ---------------
+def _medir(fn:Callable[[],int], repeticoes:int)->Dict[str,float]:
+    """Roda fn (que devolve o nº de unidades de trabalho) e mede tempo (melhor de N) e pico de memória."""
+    tempos=[]; unidades=0
+    for _ in range(repeticoes):
+        t0=time.perf_counter(); unidades=fn(); tempos.append(time.perf_counter()-t0)
+    tracemalloc.start(); fn(); pico=tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    melhor=min(tempos)
+    return {'tempo_s':melhor, 'tempo_medio_s':sum(tempos)/len(tempos), 'unidades':unidades,
+            'por_segundo':(unidades/melhor if melhor>0 else float('inf')), 'pico_memoria_kb':pico/1024}
+
+def _placa_preenchida(pares:List[Tuple[int,int]])->app.Placa:
+    pl=app.Placa()
+    for i,(w,h) in enumerate(pares):
+        c,x,y=pl.melhor_posicao(app.Peca(w,h,i+1))
+        if c!=float('inf'): pl.colocar(app.Peca(w,h,i+1),x,y,custo_laser_incremental=c)
+    return pl
+
+def _arquivo_entrada(pares:List[Tuple[int,int]], pasta:Path, nome:str)->Path:
+    f=pasta/f"{nome}.txt"; f.write_text(f"{len(pares)}\n"+"\n".join(f"{w} {h}" for w,h in pares)+"\n", encoding='utf-8')
+    return f
+
+def rodar(seed:int, repeticoes:int, n_bruto:int, n_maxrect:int, filtro:str=None)->Dict[str,Dict]:
+    resultados={}; tmp=Path(tempfile.mkdtemp(prefix="bench_paa_"))
+    def registrar(nome:str, fn:Callable[[],int], unidade:str, **extra):
+        if filtro and filtro not in nome: return
+        r=_medir(fn,repeticoes); r['unidade']=unidade; r.update(extra); resultados[nome]=r
+        print(f"  {nome:<38} {r['tempo_s']*1000:10.2f} ms  {r['por_segundo']:12.1f} {unidade}/s  {r['pico_memoria_kb']:9.1f} KB")
+
+    # importação do app num interpretador novo (o que o cli.py headless paga antes de resolver)
+    cod=f"import sys; sys.path.insert(0,{str(SCRIPT_DIR.parent/'interface')!r}); import app; " \
+        "print(','.join(m for m in ('numpy','matplotlib','webview') if m in sys.modules))"
+    pesados=[]
+    def _importacao()->int:
+        r=subprocess.run([sys.executable,"-c",cod],capture_output=True,text=True,check=True)
+        pesados[:]=[m for m in r.stdout.strip().split(",") if m]; return 1
+    registrar("importacao/app", _importacao, "processos")
+    if "importacao/app" in resultados: resultados["importacao/app"]['modulos_pesados']=pesados
+
+    for conjunto in CONJUNTOS:
+        # melhor_posicao numa placa já com peças: colocações/s
+        base=gerar(conjunto,12,seed); amostra=gerar(conjunto,20,seed+1)
+        pl=_placa_preenchida(base)
+        def _posicoes(pl=pl, amostra=amostra)->int:
+            for i,(w,h) in enumerate(amostra): pl.melhor_posicao(app.Peca(w,h,i+1))
+            return len(amostra)
+        registrar(f"melhor_posicao/{conjunto}", _posicoes, "colocacoes")
+
+        # _calcular_solucao: ordens (permutações) avaliadas/s
+        pares=gerar(conjunto,n_bruto,seed)
+        ordens=[random.Random(seed+k).sample(range(len(pares)),len(pares)) for k in range(10)]
+        def _ordens(pares=pares, ordens=ordens)->int:
+            for o in ordens: app._pool_placas.devolver_todas(app._calcular_solucao([app.Peca(pares[i][0],pares[i][1],i+1) for i in o])[0])
+            return len(ordens)
+        registrar(f"calcular_solucao/{conjunto}", _ordens, "permutacoes", n=len(pares))
+
+        # forca_bruta_total com N limitado: permutações (do espaço N!) cobertas por segundo
+        f=_arquivo_entrada(pares,tmp,f"bruto_{conjunto}")
+        def _bruto(f=f, n=len(pares))->int:
+            app.forca_bruta_total(f,processos=1,renderizar=False,checkpoint=False); return math.factorial(n)
+        registrar(f"forca_bruta_total/{conjunto}", _bruto, "permutacoes", n=len(pares))
+
+        # MaxRect: uma ordem (_mr_run) e o processo completo
+        mr=gerar(conjunto,n_maxrect,seed); ordem=[(w,h,i+1) for i,(w,h) in enumerate(mr)]
+        def _mr(ordem=ordem)->int:
+            app._pool_mr.devolver_todas(app._mr_run(ordem,draw_steps=False)[0]); return len(ordem)
+        registrar(f"mr_run/{conjunto}", _mr, "colocacoes", n=len(ordem))
+        f=_arquivo_entrada(mr,tmp,f"maxrect_{conjunto}")
+        def _mrp(f=f)->int:
+            random.seed(seed); app.maxrect_process(f,renderizar=False,processos=1); return 1
+        registrar(f"maxrect_process/{conjunto}", _mrp, "execucoes", n=len(mr))
+    return resultados
+
+def _meta(seed:int, repeticoes:int, n_bruto:int, n_maxrect:int)->Dict:
+    try: commit=subprocess.run(["git","rev-parse","--short","HEAD"],cwd=SCRIPT_DIR,capture_output=True,text=True).stdout.strip()
+    except Exception: commit=""
+    return {'data':time.strftime("%Y-%m-%d %H:%M:%S"), 'commit':commit, 'python':platform.python_version(),
+            'plataforma':platform.platform(), 'cpus':os.cpu_count(), 'seed':seed, 'repeticoes':repeticoes,
+            'n_bruto':n_bruto, 'n_maxrect':n_maxrect,
+            'config':{'BUSCA_POSICAO':app.BUSCA_POSICAO, 'OCUPACAO_BACKEND':app.OCUPACAO_BACKEND, 'MODO_BRUTO':app.MODO_BRUTO}}
+
+def comparar(a:Path, b:Path):
+    ra=json.loads(a.read_text(encoding='utf-8')); rb=json.loads(b.read_text(encoding='utf-8'))
+    print(f"A: {a.name} ({ra['meta'].get('commit','')})   B: {b.name} ({rb['meta'].get('commit','')})")
+    print(f"{'benchmark':<38} {'A ms':>10} {'B ms':>10} {'A/B':>7} {'mem A KB':>10} {'mem B KB':>10}")
+    for nome in sorted(set(ra['resultados'])|set(rb['resultados'])):
+        x=ra['resultados'].get(nome); y=rb['resultados'].get(nome)
+        if not x or not y: print(f"{nome:<38} {'—' if not x else '':>10} {'—' if not y else '':>10}"); continue
+        ganho=x['tempo_s']/y['tempo_s'] if y['tempo_s']>0 else float('inf')
+        print(f"{nome:<38} {x['tempo_s']*1000:10.2f} {y['tempo_s']*1000:10.2f} {ganho:6.2f}x {x['pico_memoria_kb']:10.1f} {y['pico_memoria_kb']:10.1f}")
+
+def main():
+    ap=argparse.ArgumentParser(description="Benchmarks dos motores de corte (sem renderização).")
+    ap.add_argument("--saida", type=Path, default=Path("bench_resultados.json"))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--n-bruto", type=int, default=6, help="nº de peças no força bruta (N! cresce rápido)")
+    ap.add_argument("--n-maxrect", type=int, default=60)
+    ap.add_argument("--filtro", help="roda só benchmarks cujo nome contém o texto")
+    ap.add_argument("--busca", choices=["candidatos","vetorial","varredura"])
+    ap.add_argument("--backend", choices=["bits","sat"])
+    ap.add_argument("--comparar", nargs=2, type=Path, metavar=("A.json","B.json"))
+    args=ap.parse_args()
+    if args.comparar: comparar(*args.comparar); return
+    if args.busca: app.BUSCA_POSICAO=args.busca
+    if args.backend: app.OCUPACAO_BACKEND=args.backend
+    print(f"seed={args.seed} repetições={args.repeticoes} busca={app.BUSCA_POSICAO} backend={app.OCUPACAO_BACKEND}")
+    res=rodar(args.seed,args.repeticoes,args.n_bruto,args.n_maxrect,args.filtro)
+    dados={'meta':_meta(args.seed,args.repeticoes,args.n_bruto,args.n_maxrect),'resultados':res}
+    args.saida.write_text(json.dumps(dados,indent=2,ensure_ascii=False),encoding='utf-8')
+    print(f"✓ resultados em {args.saida}")
+
+if __name__=="__main__":
+    main()
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import math, sys, os, io, re, time, base64, logging, threading, random
+import math, sys, os, io, re, time, json, base64, bisect, hashlib, logging, threading, random, queue
+import multiprocessing as mp
 from pathlib import Path
+from collections import OrderedDict, deque
 from itertools import permutations
 from typing import List, Tuple, Dict
 
-import numpy as np
-import webview
-
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+# NumPy, matplotlib e webview são importados só onde são usados (backend 'sat'/busca 'vetorial', _mpl e o
+# __main__): o modo headless (cli.py) resolve a entrada sem pagar a importação da GUI e do desenho.
 
 logging.getLogger('pywebview').setLevel(logging.CRITICAL)
 if sys.platform == 'win32':
@@ -32,6 +29,17 @@ PLACA_ALTURA  = 300
 MARGEM        = 10
 LASER_CUSTO_POR_CM = 0.01
 PLACA_CUSTO        = 1000.0
+BUSCA_POSICAO      = 'candidatos'  # melhor_posicao: 'candidatos' (âncoras das bordas) | 'vetorial' (NumPy) | 'varredura'
+MODO_BRUTO         = 'bb'   # 'bb' = branch-and-bound | 'dfs' = todas as ordens, reaproveitando o prefixo
+                            # | 'permutacoes' = todas as ordens, refazendo cada uma do zero
+OCUPACAO_BACKEND   = 'bits' # 'bits' = uma linha por int (bitmask) | 'sat' = NumPy + summed-area table
+BRUTO_PROCESSOS    = os.cpu_count() or 1   # processos do modo 'bb' (1 = serial na thread atual)
+BRUTO_MIN_ORDENS_PARALELO = 40320   # faixas com menos ordens (8!) rodam em série: terminam antes de o pool subir
+SAIDA_PNG          = True   # False = soluções e passos do MaxRect só em JSON (layout.json / step_NNN.json),
+                            # desenhados pela própria página em vez do matplotlib
+RENDER_PROCESSOS   = min(4,os.cpu_count() or 1)   # processos que desenham os PNGs (1 = na própria thread)
+CHECKPOINT_S       = 30.0   # segundos entre checkpoints do força bruta (0 = sem checkpoint nem retomada)
+CHECKPOINT_DIR     = DATA_DIR / "checkpoints"
 
 pagina_html = r"""
 <!DOCTYPE html>
@@ -61,6 +69,9 @@ pagina_html = r"""
   .btn{padding:.75rem 1.5rem;border:none;border-radius:8px;font-weight:700;cursor:pointer;transition:.2s;box-shadow:0 2px 4px rgba(0,0,0,.1);white-space:nowrap}
   .btn-primary{background:#3b82f6;color:#fff}.btn-primary:hover{background:#2563eb;transform:translateY(-2px)}
   .btn-secondary{background:#10b981;color:#fff}.btn-secondary:hover{background:#059669;transform:translateY(-2px)}
+  .btn-stop{background:#ef4444;color:#fff}.btn-stop:hover{background:#dc2626;transform:translateY(-2px)}
+  .btn:disabled{opacity:.5;cursor:default;transform:none}
+  .stats-line{display:block;margin-top:.35rem;color:#64748b;font-size:.8rem;font-variant-numeric:tabular-nums}
   .input-container{display:flex;flex-direction:column;gap:1rem;flex-grow:1}
   .image-preview{background:#f8fafc;border:2px solid #e2e8f0;border-radius:8px;padding:1rem;min-height:300px;display:flex;align-items:center;justify-content:center;overflow:auto;flex-grow:1;position:relative}
   .image-preview img{max-width:100%;max-height:100%;object-fit:contain;border-radius:8px}
@@ -110,7 +121,9 @@ pagina_html = r"""
           <div><button id="btnCarregar" class="btn btn-primary" onclick="selecionarTXT()">📁 Carregar Arquivo TXT</button></div>
           <div>
             <button id="btnProcessar" class="btn btn-secondary" onclick="processarBruto()">▶️ Processar (Bruto)</button>
+            <button id="btnPararBruto" class="btn btn-stop" onclick="pararBruto()" disabled>⏹ Parar</button>
             <span id="procStatus" style="margin-left:.5rem;color:#334155;font-weight:600"></span>
+            <span id="procStats" class="stats-line"></span>
           </div>
         </div>
         <div class="input-container">
@@ -178,7 +191,9 @@ pagina_html = r"""
           <div><button class="btn btn-primary" onclick="selecionarTXT()">📁 Carregar Arquivo TXT</button></div>
           <div>
             <button id="btnMR" class="btn btn-secondary" onclick="processarMaxRect()">▶️ Rodar MaxRect</button>
+            <button id="btnPararMR" class="btn btn-stop" onclick="pararMaxRect()" disabled>⏹ Parar</button>
             <span id="mrStatus" style="margin-left:.5rem;color:#334155;font-weight:600"></span>
+            <span id="mrStats" class="stats-line"></span>
           </div>
         </div>
 
@@ -253,6 +268,53 @@ pagina_html = r"""
   function nextEntrada(){entrada.idx++; renderEntrada(); renderEntradaMR();}
   function prevEntrada(){entrada.idx--; renderEntrada(); renderEntradaMR();}
 
+  // -------- layouts JSON (SAIDA_PNG=False): desenhados aqui, num canvas fora da tela --------
+  const SET3=['#8dd3c7','#ffffb3','#bebada','#fb8072','#80b1d3','#fdb462','#b3de69','#fccde5','#d9d9d9','#bc80bd','#ccebc5','#ffed6f'];
+  function _cruza(a,b){return a[0]<b[0]+b[2] && b[0]<a[0]+a[2] && a[1]<b[1]+b[3] && b[1]<a[1]+a[3];}
+  // placas lado a lado; dest={placa, tracejados, removidos, novos, peca:[x,y,w,h], cortes} destaca uma delas
+  function desenharLayout(dims, placas, titulos, dest, medidas){
+    const [W,H,M]=dims, E=2, P=30, c=document.createElement('canvas'), g=c.getContext('2d');
+    c.width=placas.length*(W*E+P)+P; c.height=H*E+P+10;
+    g.fillStyle='#fff'; g.fillRect(0,0,c.width,c.height);
+    placas.forEach((pl,i)=>{
+      const ox=P+i*(W*E+P), oy=P;
+      const R=(x,y,w,h)=>[ox+x*E, oy+(H-y-h)*E, w*E, h*E];   // y para cima, como nos PNGs
+      const ret=(r,cor,lw,tr,fundo)=>{const [x,y,w,h]=R(...r);
+        if(fundo){g.fillStyle=fundo; g.fillRect(x,y,w,h);}
+        if(cor){g.strokeStyle=cor; g.lineWidth=lw; g.setLineDash(tr||[]); g.strokeRect(x,y,w,h);}};
+      const linha=(x1,y1,x2,y2)=>{const [a,b]=R(x1,y1,0,0),[c2,d]=R(x2,y2,0,0); g.beginPath(); g.moveTo(a,b); g.lineTo(c2,d); g.stroke();};
+      ret([0,0,W,H],'#000',2,null,'rgba(211,211,211,.25)'); ret([M,M,W-2*M,H-2*M],'#6b7280',1.5,[6,4]);
+      g.textAlign='center'; g.textBaseline='middle'; g.font='bold 14px sans-serif'; g.fillStyle='#111827'; g.fillText(titulos[i]||'',ox+W*E/2,P/2);
+      g.font='bold 12px sans-serif';
+      for(const [id,x,y,w,h] of pl.pecas){
+        ret([x,y,w,h],'#000',2,null,SET3[id%SET3.length]);
+        const [cx,cy]=R(x+w/2,y+h/2,0,0); g.fillStyle='#111827';
+        if(medidas){g.fillText(`P${id}`,cx,cy-7); g.fillText(`${w}×${h}`,cx,cy+7);} else g.fillText(`P${id}`,cx,cy);
+      }
+      for(const r of pl.livres||[]) ret(r,'#0284c7',1.2,[2,3]);
+      if(!dest||dest.placa!==i) return;
+      for(const r of dest.tracejados||[]) ret(r,'#0369a1',1.8,[6,4]);
+      for(const r of dest.removidos||[]) ret(r,'#d946ef',2.2);
+      for(const r of dest.novos||[]) ret(r,'#22c55e',2.2);
+      if(dest.peca){
+        ret(dest.peca,'#ef4444',dest.cortes?3:2.5);
+        if(dest.cortes){
+          const [x,y,w,h]=dest.peca; g.strokeStyle='#f97316'; g.lineWidth=2; g.setLineDash([]);
+          for(const f of dest.tracejados||[]){
+            if(!_cruza(f,dest.peca)) continue;
+            const yl=Math.max(f[1],y), yh=Math.min(f[1]+f[3],y+h), xl=Math.max(f[0],x), xh=Math.min(f[0]+f[2],x+w);
+            linha(x,yl,x,yh); linha(x+w,yl,x+w,yh); linha(xl,y,xh,y); linha(xl,y+h,xh,y+h);
+          }
+        }
+      }
+    });
+    return c.toDataURL('image/png');
+  }
+  function imagensDoLayout(l){
+    return l&&l.placas ? l.placas.map((pl,i)=>desenharLayout(l.dimensoes,[pl],[`Placa ${i+1}`],null,true)) : [];
+  }
+  function imagensDaSolucao(r){return (r.images&&r.images.length) ? r.images : imagensDoLayout(r.layout);}
+
   // -------- BRUTO watcher --------
   const state={atual:{images:[],idx:0,infoText:''},antiga:{images:[],idx:0,infoText:''}};
   let lastAtualInfo='', lastAntigaInfo='';
@@ -279,34 +341,68 @@ pagina_html = r"""
   }
   function nextImage(w){state[w].idx++; setGallery(w);} function prevImage(w){state[w].idx--; setGallery(w);}
 
-  let pollingHandle=null;
+  let pollingHandle=null, solCursor=null;
   async function processarBruto(){
     const btn=document.getElementById('btnProcessar'); const status=document.getElementById('procStatus');
-    btn.disabled=true; status.innerHTML='Processando<span class="spinner"></span>'; setProcessingUI(true);
+    btn.disabled=true; document.getElementById('btnPararBruto').disabled=false; status.innerHTML='Processando<span class="spinner"></span>'; setProcessingUI(true);
     try{window.pywebview.api.forca_bruta();}catch(e){console.error(e);}
     if(!pollingHandle){pollingHandle=setInterval(fetchSolucoes,1500);}
   }
+  // a busca para no próximo ponto de verificação e a melhor solução até ali vira a 'solucao final'
+  async function pararBruto(){
+    document.getElementById('btnPararBruto').disabled=true; document.getElementById('procStatus').innerHTML='Parando<span class="spinner"></span>';
+    try{await window.pywebview.api.cancelar_forca_bruta();}catch(e){console.error(e);}
+  }
+  // progresso, taxa e ETA da execução (Api.get_stats), atualizados junto com o polling de cada motor
+  function textoStats(s){
+    const fmt=v=>v>=1e6?(v/1e6).toFixed(1)+'M':v>=1e3?(v/1e3).toFixed(1)+'k':String(Math.round(v));
+    const hms=t=>{t=Math.round(t); return `${Math.floor(t/3600)}h${String(Math.floor(t/60)%60).padStart(2,'0')}m${String(t%60).padStart(2,'0')}s`;};
+    return (s.progresso==null?'':`${(100*s.progresso).toFixed(1)}% • `)+`${fmt(s.ordens_por_s)} ordens/s • ${fmt(s.colocacoes_por_s)} colocações/s`+(s.eta_s==null?'':` • ETA ${hms(s.eta_s)}`);
+  }
+  async function fetchStats(motor,id){
+    try{const s=(await window.pywebview.api.get_stats())[motor]; document.getElementById(id).textContent=s.processing?textoStats(s):'';}catch(e){console.error(e);}
+  }
   async function fetchSolucoes(){
     try{
-      const res=await window.pywebview.api.get_solutions();
+      const res=await window.pywebview.api.get_solutions(solCursor);
       if(typeof res?.processing==='boolean'){
         setProcessingUI(res.processing);
+        if(res.processing) fetchStats('bruto','procStats'); else document.getElementById('procStats').textContent='';
+        document.getElementById('btnPararBruto').disabled=!res.processing||!!res.stopping;
+        if(res.processing&&res.stopping) document.getElementById('procStatus').innerHTML='Parando<span class="spinner"></span>';
         if(!res.processing){document.getElementById('btnProcessar').disabled=false; document.getElementById('procStatus').textContent='';}
       }
-      if(res?.atual){
-        state.atual.images=res.atual.images||[]; state.atual.infoText=res.atual.info_text||''; if(state.atual.idx>=state.atual.images.length) state.atual.idx=0;
+      if(!res || res.not_modified) return;
+      solCursor=res.cursor||null;
+      if(res.shift){
+        state.antiga={images:state.atual.images,idx:0,infoText:state.atual.infoText};
+        if(state.antiga.infoText!==lastAntigaInfo){resetTimer('antiga'); lastAntigaInfo=state.antiga.infoText;} setGallery('antiga');
+      }
+      if(res.atual){
+        state.atual.images=imagensDaSolucao(res.atual); state.atual.infoText=res.atual.info_text||''; if(state.atual.idx>=state.atual.images.length) state.atual.idx=0;
         if(res.atual.info_text!==lastAtualInfo){resetTimer('atual'); lastAtualInfo=res.atual.info_text;} setGallery('atual');
       }
-      if(res?.antiga){
-        state.antiga.images=res.antiga.images||[]; state.antiga.infoText=res.antiga.info_text||''; if(state.antiga.idx>=state.antiga.images.length) state.antiga.idx=0;
+      if(res.antiga){
+        state.antiga.images=imagensDaSolucao(res.antiga); state.antiga.infoText=res.antiga.info_text||''; if(state.antiga.idx>=state.antiga.images.length) state.antiga.idx=0;
         if(res.antiga.info_text!==lastAntigaInfo){resetTimer('antiga'); lastAntigaInfo=res.antiga.info_text;} setGallery('antiga');
       }
     }catch(e){console.error(e);}
   }
 
   // -------- MAXRECT — auto play (lê TODOS PNGs ordenados) --------
-  const mr={images:[], idx:-1, info:'', running:false};
-  let mrPolling=null, mrAuto=null;
+  const mr={images:[], idx:-1, info:'', running:false, placas:[]};
+  let mrPolling=null, mrAuto=null, mrCursor=null;
+
+  // passo JSON -> frames pre/split/after (mr.placas guarda o estado das placas entre os passos)
+  function framesDoPasso(dims,p){
+    const [W,H,M]=dims, placas=mr.placas;
+    if(p.nova) placas.push({pecas:[],livres:[[M,M,W-2*M,H-2*M]]});
+    const pl=placas[p.placa], peca=p.peca.slice(1), tit=e=>placas.map((_,i)=>`Placa ${i+1} — ${e}`);
+    const pre=desenharLayout(dims,placas,tit('PRE'),{placa:p.placa,tracejados:pl.livres,peca,cortes:true});
+    pl.pecas.push(p.peca); pl.livres=p.livres;
+    const split=desenharLayout(dims,placas,tit('SPLIT'),{placa:p.placa,removidos:p.removidos,novos:p.novos,peca});
+    return [pre,split,desenharLayout(dims,placas,tit('AFTER'))];
+  }
 
   function startAuto(){
     if(mrAuto) return;
@@ -331,22 +427,28 @@ pagina_html = r"""
 
   async function processarMaxRect(){
     const btn=document.getElementById('btnMR'); const st=document.getElementById('mrStatus');
-    btn.disabled=true; st.innerHTML='Processando<span class="spinner"></span>';
+    btn.disabled=true; document.getElementById('btnPararMR').disabled=false; st.innerHTML='Processando<span class="spinner"></span>';
     document.getElementById('spinMRin').style.visibility='visible';
     document.getElementById('spinMRprog').style.visibility='visible';
-    resetTimer('mrprog'); mr.idx=-1; mr.images=[]; renderMR();
+    resetTimer('mrprog'); mr.idx=-1; mr.images=[]; mr.placas=[]; mrCursor=null; renderMR();
     try{ await window.pywebview.api.maxrect(); }catch(e){ console.error(e); }
     if(!mrPolling){ mrPolling=setInterval(fetchMaxRect, 1000); }
     startAuto();
   }
+  async function pararMaxRect(){
+    document.getElementById('btnPararMR').disabled=true; document.getElementById('mrStatus').textContent='Parando…';
+    try{await window.pywebview.api.cancelar_maxrect();}catch(e){console.error(e);}
+  }
 
   async function fetchMaxRect(){
     try{
-      const res = await window.pywebview.api.get_maxrect();
+      const res = await window.pywebview.api.get_maxrect(mrCursor);
       if(!res) return;
       mr.running = !!res.processing;
       document.getElementById('btnMR').disabled = mr.running;
-      document.getElementById('mrStatus').textContent = mr.running ? 'Processando…' : '';
+      document.getElementById('btnPararMR').disabled = !mr.running || !!res.stopping;
+      document.getElementById('mrStatus').textContent = mr.running ? (res.stopping ? 'Parando…' : 'Processando…')+(res.melhor ? ` • melhor R$${res.melhor.custo.toFixed(2)} (${res.melhor.avaliacoes} avaliações)` : '') : '';
+      if(mr.running) fetchStats('maxrect','mrStats'); else document.getElementById('mrStats').textContent='';
       document.getElementById('spinMRin').style.visibility = mr.running ? 'visible':'hidden';
       document.getElementById('spinMRprog').style.visibility = mr.running ? 'visible':'hidden';
 // Se está processando e, por algum motivo, o auto-play não está ligado, liga de novo
@@ -354,9 +456,14 @@ pagina_html = r"""
        startAuto();
      }
 
-      if(res.after){
+      if(res.after && !res.not_modified){
         const prevLen = mr.images.length;
-        mr.images = res.after.images || [];
+        if(res.reset) mr.placas=[];
+        let novas = res.after.images || [];
+        if(!novas.length && res.after.passos) novas = res.after.passos.flatMap(p=>framesDoPasso(res.dimensoes,p));
+        if(res.reset){ mr.images = novas; if(mr.idx >= mr.images.length) mr.idx = mr.images.length-1; }
+        else { mr.images = mr.images.concat(novas); }
+        mrCursor = res.cursor || null;
         mr.info   = res.after.info_text || '';
         // Chegaram novos frames? garante auto ligado
        if(mr.images.length > prevLen){ startAuto(); }
@@ -381,12 +488,27 @@ if(!mr.running && mr.idx >= mr.images.length - 1)
 </html>
 """
 
+# --------------- importações tardias ---------------
+_MPL=None
+def _mpl():
+    """(matplotlib, pyplot, patches) com backend Agg, importados na primeira vez que algo é desenhado."""
+    global _MPL
+    if _MPL is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as patches
+        _MPL=(matplotlib,plt,patches)
+    return _MPL
+
 # --------------- helpers preview ---------------
 def _fig_to_data_uri(fig)->str:
+    _,plt,_=_mpl()
     buf=io.BytesIO(); fig.savefig(buf, format='png', dpi=150, bbox_inches='tight'); plt.close(fig)
     b64=base64.b64encode(buf.getvalue()).decode('ascii'); return f"data:image/png;base64,{b64}"
 
 def _desenhar_peca_preview(w:int,h:int,pid:int)->str:
+    _,plt,patches=_mpl()
     PAD=20; max_side=max(w,h)
     fig,ax=plt.subplots(figsize=(6,6))
     ax.set_xlim(0,max_side+2*PAD); ax.set_ylim(0,max_side+2*PAD); ax.set_aspect('equal'); ax.axis('off')
@@ -427,51 +549,160 @@ class Peca:
     def __init__(self, largura:int, altura:int, pid:int):
         self.largura=largura; self.altura=altura; self.id=pid; self.x=0; self.y=0
 
+class OcupacaoSAT:
+    """Grade de ocupação NumPy + summed-area table: sat[y,x] = nº de células ocupadas em [0,y)×[0,x).
+    Qualquer consulta de retângulo custa O(1), independente do tamanho da peça."""
+    def __init__(self,largura:int,altura:int):
+        import numpy as np
+        self.largura=largura; self.altura=altura
+        self.grid=np.zeros((altura,largura),dtype=np.bool_)
+        self.sat=np.zeros((altura+1,largura+1),dtype=np.int32)
+
+    def contar(self,x:int,y:int,w:int,h:int)->int:
+        s=self.sat; return int(s[y+h,x+w]-s[y,x+w]-s[y+h,x]+s[y,x])
+
+    def livre(self,x:int,y:int,w:int,h:int)->bool:
+        return self.contar(x,y,w,h)==0
+
+    def marcar(self,x:int,y:int,w:int,h:int):
+        # a região deve estar livre (peças não se sobrepõem): cada célula soma 1 exatamente uma vez
+        import numpy as np
+        self.grid[y:y+h,x:x+w]=True
+        ry=np.minimum(np.arange(1,self.altura-y+1),h); cx=np.minimum(np.arange(1,self.largura-x+1),w)
+        self.sat[y+1:,x+1:]+=np.outer(ry,cx).astype(np.int32)
+
+    def desmarcar(self,x:int,y:int,w:int,h:int):
+        # inverso exato de marcar (a região deve ter sido marcada inteira)
+        import numpy as np
+        self.grid[y:y+h,x:x+w]=False
+        ry=np.minimum(np.arange(1,self.altura-y+1),h); cx=np.minimum(np.arange(1,self.largura-x+1),w)
+        self.sat[y+1:,x+1:]-=np.outer(ry,cx).astype(np.int32)
+
+    def tabela_somas(self)->'np.ndarray':
+        return self.sat
+
+    def copia(self)->'OcupacaoSAT':
+        c=OcupacaoSAT.__new__(OcupacaoSAT); c.largura=self.largura; c.altura=self.altura
+        c.grid=self.grid.copy(); c.sat=self.sat.copy(); return c
+
+class OcupacaoBits:
+    """Cada linha da placa é um int usado como bitmask (bit x = célula (x,y) ocupada), e cada coluna também
+    (bit y). Colisão é um AND por linha ou por coluna (o lado menor da peça) e contagem de borda é um
+    popcount numa linha/coluna vizinha; ~40 KB por placa contra ~450 KB da SAT."""
+    def __init__(self,largura:int,altura:int):
+        self.largura=largura; self.altura=altura; self.linhas=[0]*altura; self.colunas=[0]*largura
+
+    def contar(self,x:int,y:int,w:int,h:int)->int:
+        if h==1: return (self.linhas[y]&(((1<<w)-1)<<x)).bit_count()
+        if w==1: return (self.colunas[x]&(((1<<h)-1)<<y)).bit_count()
+        if w<=h:
+            m=((1<<h)-1)<<y; return sum((c&m).bit_count() for c in self.colunas[x:x+w])
+        m=((1<<w)-1)<<x; return sum((r&m).bit_count() for r in self.linhas[y:y+h])
+
+    def livre(self,x:int,y:int,w:int,h:int)->bool:
+        if w<=h: faixas,m=self.colunas[x:x+w],((1<<h)-1)<<y
+        else: faixas,m=self.linhas[y:y+h],((1<<w)-1)<<x
+        for f in faixas:
+            if f&m: return False
+        return True
+
+    def marcar(self,x:int,y:int,w:int,h:int):
+        linhas=self.linhas; colunas=self.colunas
+        m=((1<<w)-1)<<x
+        for yy in range(y,y+h): linhas[yy]|=m
+        m=((1<<h)-1)<<y
+        for xx in range(x,x+w): colunas[xx]|=m
+
+    def desmarcar(self,x:int,y:int,w:int,h:int):
+        linhas=self.linhas; colunas=self.colunas
+        m=~(((1<<w)-1)<<x)
+        for yy in range(y,y+h): linhas[yy]&=m
+        m=~(((1<<h)-1)<<y)
+        for xx in range(x,x+w): colunas[xx]&=m
+
+    def tabela_somas(self)->'np.ndarray':
+        import numpy as np
+        nb=(self.largura+7)//8
+        bits=np.frombuffer(b''.join(r.to_bytes(nb,'little') for r in self.linhas),dtype=np.uint8).reshape(self.altura,nb)
+        g=np.unpackbits(bits,axis=1,bitorder='little')[:,:self.largura].astype(np.int32)
+        sat=np.zeros((self.altura+1,self.largura+1),dtype=np.int32); sat[1:,1:]=g.cumsum(0).cumsum(1); return sat
+
+    def copia(self)->'OcupacaoBits':
+        c=OcupacaoBits.__new__(OcupacaoBits); c.largura=self.largura; c.altura=self.altura
+        c.linhas=self.linhas[:]; c.colunas=self.colunas[:]; return c
+
+def _nova_ocupacao(largura:int,altura:int):
+    return OcupacaoBits(largura,altura) if OCUPACAO_BACKEND=='bits' else OcupacaoSAT(largura,altura)
+
 class Placa:
     def __init__(self):
         self.largura=PLACA_LARGURA; self.altura=PLACA_ALTURA
-        self.ocupacao=[[False]*self.largura for _ in range(self.altura)]
+        self.ocupacao=_nova_ocupacao(self.largura,self.altura)
         self.pecas:List[Peca]=[]
-        self.laser_corte=0.0
+        self.laser_corte=0.0; self._laser_hist:List[float]=[]
+        self.bordas_x:Dict[int,int]={}; self.bordas_y:Dict[int,int]={}   # aresta -> nº de peças com aresta nela
 
     def verificar_espaco(self,x:int,y:int,w:int,h:int)->bool:
         x_min=MARGEM; y_min=MARGEM; x_max=self.largura-MARGEM; y_max=self.altura-MARGEM
         if x<x_min or y<y_min or x+w>x_max or y+h>y_max: return False
-        for yy in range(y,y+h):
-            row=self.ocupacao[yy]
-            for xx in range(x,x+w):
-                if row[xx]: return False
-        return True
+        return self.ocupacao.livre(x,y,w,h)
 
     def ocupar_espaco(self,x:int,y:int,w:int,h:int):
-        for yy in range(y,y+h):
-            row=self.ocupacao[yy]
-            for xx in range(x,x+w):
-                row[xx]=True
+        self.ocupacao.marcar(x,y,w,h)
 
     def _corte_compartilhado(self,x:int,y:int,w:int,h:int)->int:
-        comp=0
-        if y>0:
-            row=self.ocupacao[y-1]
-            for xx in range(x,x+w):
-                if row[xx]: comp+=1
-        if y+h<self.altura:
-            row=self.ocupacao[y+h]
-            for xx in range(x,x+w):
-                if row[xx]: comp+=1
-        if x>0:
-            for yy in range(y,y+h):
-                if self.ocupacao[yy][x-1]: comp+=1
-        if x+w<self.largura:
-            for yy in range(y,y+h):
-                if self.ocupacao[yy][x+w]: comp+=1
+        occ=self.ocupacao; comp=0
+        if y>0: comp+=occ.contar(x,y-1,w,1)
+        if y+h<self.altura: comp+=occ.contar(x,y+h,w,1)
+        if x>0: comp+=occ.contar(x-1,y,1,h)
+        if x+w<self.largura: comp+=occ.contar(x+w,y,1,h)
         return comp
 
     def custo_posicao(self,x:int,y:int,w:int,h:int)->float:
         perimetro=2*(w+h); compartilhado=self._corte_compartilhado(x,y,w,h)
         return (perimetro-compartilhado)*LASER_CUSTO_POR_CM
 
+    def _ancoras(self,w:int,h:int)->Tuple[List[int],List[int]]:
+        # O custo é linear por partes em x (e em y) com quebras só em e e e-w (e-h) para cada aresta e
+        # de peça, e a viabilidade muda nesses mesmos pontos; logo a primeira posição ótima da varredura
+        # linha-a-linha está sempre em xs×ys.
+        x_lo,x_hi=MARGEM,self.largura-MARGEM-w; y_lo,y_hi=MARGEM,self.altura-MARGEM-h
+        xs={x_lo,x_hi}; ys={y_lo,y_hi}
+        for e in self.bordas_x: xs.add(e); xs.add(e-w)
+        for e in self.bordas_y: ys.add(e); ys.add(e-h)
+        return sorted(v for v in xs if x_lo<=v<=x_hi), sorted(v for v in ys if y_lo<=v<=y_hi)
+
     def melhor_posicao(self,p:Peca)->Tuple[float,int,int]:
+        if BUSCA_POSICAO=='vetorial': return self._melhor_posicao_vetorial(p)
+        if BUSCA_POSICAO=='varredura': return self._melhor_posicao_varredura(p)
+        best=(float('inf'),-1,-1); w,h=p.largura,p.altura
+        xs,ys=self._ancoras(w,h)
+        for yy in ys:
+            for xx in xs:
+                if self.verificar_espaco(xx,yy,w,h):
+                    c=self.custo_posicao(xx,yy,w,h)
+                    if c<best[0]: best=(c,xx,yy)
+        return best
+
+    def _melhor_posicao_vetorial(self,p:Peca)->Tuple[float,int,int]:
+        # Todas as âncoras de uma vez: janelas da summed-area table dão ocupação da peça e das 4 bordas
+        # (MARGEM>=1 garante as bordas dentro da placa). argmax devolve o primeiro máximo em ordem
+        # linha-a-linha, o mesmo desempate da varredura.
+        import numpy as np
+        w,h=p.largura,p.altura; M=MARGEM
+        nx=self.largura-2*M-w+1; ny=self.altura-2*M-h+1
+        if nx<=0 or ny<=0: return (float('inf'),-1,-1)
+        S=self.ocupacao.tabela_somas()
+        def janela(x0:int,y0:int,ww:int,hh:int)->'np.ndarray':
+            return (S[y0+hh:y0+hh+ny,x0+ww:x0+ww+nx]-S[y0:y0+ny,x0+ww:x0+ww+nx]
+                    -S[y0+hh:y0+hh+ny,x0:x0+nx]+S[y0:y0+ny,x0:x0+nx])
+        comp=janela(M,M-1,w,1)+janela(M,M+h,w,1)+janela(M-1,M,1,h)+janela(M+w,M,1,h)
+        comp[janela(M,M,w,h)!=0]=-1
+        k=int(np.argmax(comp)); iy,ix=divmod(k,nx)
+        if comp[iy,ix]<0: return (float('inf'),-1,-1)
+        return ((2*(w+h)-int(comp[iy,ix]))*LASER_CUSTO_POR_CM,M+ix,M+iy)
+
+    def _melhor_posicao_varredura(self,p:Peca)->Tuple[float,int,int]:
         best=(float('inf'),-1,-1)
         for yy in range(MARGEM,self.altura-MARGEM-p.altura+1):
             for xx in range(MARGEM,self.largura-MARGEM-p.largura+1):
@@ -482,9 +713,58 @@ class Placa:
 
     def colocar(self,p:Peca,x:int,y:int,custo_laser_incremental:float=0.0):
         p.x,p.y=x,y; self.ocupar_espaco(x,y,p.largura,p.altura); self.pecas.append(p)
-        self.laser_corte+=float(custo_laser_incremental)
-
-def _desenhar_placa_png(placa:Placa, idx:int, destino:Path):
+        for b,e in ((self.bordas_x,x),(self.bordas_x,x+p.largura),(self.bordas_y,y),(self.bordas_y,y+p.altura)): b[e]=b.get(e,0)+1
+        self._laser_hist.append(self.laser_corte); self.laser_corte+=float(custo_laser_incremental)
+
+    def remover(self)->Peca:
+        """Desfaz o último colocar (ocupação, arestas e laser voltam exatamente ao estado anterior)."""
+        p=self.pecas.pop(); x,y=p.x,p.y
+        self.ocupacao.desmarcar(x,y,p.largura,p.altura)
+        for b,e in ((self.bordas_x,x),(self.bordas_x,x+p.largura),(self.bordas_y,y),(self.bordas_y,y+p.altura)):
+            if b[e]==1: del b[e]
+            else: b[e]-=1
+        self.laser_corte=self._laser_hist.pop(); return p
+
+    def limpar(self):
+        """Volta ao estado de placa nova desmarcando só as regiões das peças colocadas."""
+        for p in self.pecas: self.ocupacao.desmarcar(p.x,p.y,p.largura,p.altura)
+        self.pecas.clear(); self.bordas_x.clear(); self.bordas_y.clear()
+        self.laser_corte=0.0; self._laser_hist.clear()
+
+    def copia(self)->'Placa':
+        c=Placa.__new__(Placa); c.largura=self.largura; c.altura=self.altura
+        c.ocupacao=self.ocupacao.copia(); c.pecas=self.pecas[:]; c.laser_corte=self.laser_corte
+        c._laser_hist=self._laser_hist[:]; c.bordas_x=dict(self.bordas_x); c.bordas_y=dict(self.bordas_y); return c
+
+class _PoolPlacas:
+    """Placas devolvidas são limpas (só as regiões ocupadas) e reaproveitadas, em vez de alocar uma grade
+    nova para cada placa aberta durante a busca. Só devolva placas que ninguém mais referencia (soluções
+    publicadas, snapshots na fila de render etc. ficam fora do pool). atual(pl) diz se a placa ainda é do tamanho
+    (e backend) configurado agora: depois de uma troca as placas guardadas são descartadas."""
+    MAX_LIVRES=64
+    def __init__(self,fabrica,atual):
+        self._fabrica=fabrica; self._atual=atual; self._livres=[]
+
+    def obter(self):
+        if self._livres:
+            pl=self._livres.pop()
+            if self._atual(pl): return pl
+            self._livres.clear()
+        return self._fabrica()
+
+    def devolver(self,pl):
+        if len(self._livres)>=self.MAX_LIVRES or not self._atual(pl): return
+        pl.limpar(); self._livres.append(pl)
+
+    def devolver_todas(self,placas):
+        for pl in placas: self.devolver(pl)
+
+_pool_placas=_PoolPlacas(Placa,lambda pl: (pl.largura,pl.altura)==(PLACA_LARGURA,PLACA_ALTURA)
+                         and isinstance(pl.ocupacao,OcupacaoBits)==(OCUPACAO_BACKEND=='bits'))
+
+def _desenhar_pecas_png(pecas:List[Tuple[int,int,int,int,int]], idx:int, destino:Path):
+    """PNG de uma placa a partir das peças (id,x,y,w,h): só tuplas, para poder rodar num worker de desenho."""
+    matplotlib,plt,patches=_mpl()
     fig,ax=plt.subplots(1,1,figsize=(8,6))
     ax.set_xlim(0,PLACA_LARGURA); ax.set_ylim(0,PLACA_ALTURA); ax.set_aspect('equal'); ax.grid(True,alpha=0.25)
     ax.set_title(f'Placa {idx}',fontsize=14,fontweight='bold')
@@ -492,82 +772,701 @@ def _desenhar_placa_png(placa:Placa, idx:int, destino:Path):
     ax.add_patch(patches.Rectangle((0,0),PLACA_LARGURA,PLACA_ALTURA,linewidth=2.5,edgecolor='black',facecolor='lightgray',alpha=0.25))
     ax.add_patch(patches.Rectangle((MARGEM,MARGEM),PLACA_LARGURA-2*MARGEM,PLACA_ALTURA-2*MARGEM,linewidth=1.5,edgecolor='#6b7280',facecolor='none',linestyle='--'))
     cmap=matplotlib.colormaps['Set3'].colors
-    for p in placa.pecas:
-        color=cmap[(p.id)%len(cmap)]
-        ax.add_patch(patches.Rectangle((p.x,p.y),p.largura,p.altura,linewidth=2,edgecolor='black',facecolor=color,alpha=0.8))
-        ax.text(p.x+p.largura/2,p.y+p.altura/2,f"P{p.id}\n{p.largura}×{p.altura}",ha='center',va='center',fontsize=10,fontweight='bold',color='#111827')
+    for pid,x,y,w,h in pecas:
+        color=cmap[pid%len(cmap)]
+        ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=2,edgecolor='black',facecolor=color,alpha=0.8))
+        ax.text(x+w/2,y+h/2,f"P{pid}\n{w}×{h}",ha='center',va='center',fontsize=10,fontweight='bold',color='#111827')
     destino.parent.mkdir(parents=True,exist_ok=True); plt.tight_layout(); fig.savefig(str(destino),dpi=150,bbox_inches='tight'); plt.close(fig)
 
+def _contexto_mp():
+    """Contexto dos pools de processos. Eles nascem nas threads da Api, e fork de um processo com várias threads
+    (pywebview, fila de render) não é seguro: usa forkserver onde existe e spawn no resto (Windows). Os workers
+    importam o módulo de novo, então o que foi trocado em tempo de execução vai no initializer (_config_worker)."""
+    return mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn')
+
+# constantes que o benchmark e os testes trocam depois do import e que os workers precisam ver iguais
+_CONFIG_WORKER=('PLACA_LARGURA','PLACA_ALTURA','MARGEM','LASER_CUSTO_POR_CM','PLACA_CUSTO','BUSCA_POSICAO','OCUPACAO_BACKEND',
+              'THIN_GAP_CM','THIN_PENAL')
+
+def _config_worker()->Dict:
+    return {nome:globals()[nome] for nome in _CONFIG_WORKER}
+
+def _aplicar_config(config:Dict):
+    globals().update(config)
+
+# --------- desenho em processos ----------
+# O matplotlib não pode ser usado por várias threads, então os PNGs independentes (placas de uma solução, frames
+# do MaxRect) vão para um pool de processos. Cada worker importa e aquece o matplotlib uma vez e recebe só tuplas
+# e retângulos; os arquivos e nomes gravados são os mesmos do desenho serial.
+def _desenho_init_worker(config:Dict):
+    _aplicar_config(config); _,plt,_=_mpl(); plt.close(plt.figure())
+
+class _PoolDesenho:
+    """Pool de desenho de uma execução: criado no primeiro obter() (None com RENDER_PROCESSOS<=1, e aí desenha
+    quem pediu) e fechado com close+join na saída do with, depois de terminar o que já foi enviado."""
+    def __init__(self):
+        self._pool=None; self._lock=threading.Lock()
+
+    def obter(self):
+        if RENDER_PROCESSOS<=1: return None
+        with self._lock:
+            if self._pool is None: self._pool=_contexto_mp().Pool(RENDER_PROCESSOS,initializer=_desenho_init_worker,initargs=(_config_worker(),))
+            return self._pool
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        with self._lock: pool,self._pool=self._pool,None
+        if pool is not None: pool.close(); pool.join()
+
+# --------- métricas ao vivo ----------
+class _Metricas:
+    """Contadores da execução atual de um motor, lidos pela Api.get_stats enquanto a busca roda. Os laços só
+    somam inteiros em atributos (sem lock: quem lê aceita um valor um pouco atrasado) e taxa/ETA são calculados
+    na leitura. `ordens` são as ordens já resolvidas (avaliadas, podadas ou puladas como redundantes) de um
+    `total` da execução inteira (n! no força bruta), `colocacoes` as tentativas de posicionar uma peça,
+    `posicoes` as buscas de posição feitas numa placa e `cache_hits` as que vieram do cache de placa vazia.
+    Renders enviados que nunca concluem foram substituídos por um mais novo na fila."""
+    CAMPOS=('ordens','folhas','colocacoes','posicoes','cache_hits','renders_enviados','renders_concluidos')
+    def __init__(self):
+        self.reiniciar(None)
+
+    def reiniciar(self,motor:str,n:int=0,total:int=None,feitas:int=0):
+        """feitas = ordens já resolvidas antes desta execução (checkpoint): contam no progresso, não na taxa."""
+        for c in self.CAMPOS: setattr(self,c,0)
+        self.motor=motor; self.n=n; self.total=total; self.ordens=self._ordens0=feitas
+        self.t0=time.time(); self.t_fim=None
+
+    def terminar(self):
+        if self.t_fim is None: self.t_fim=time.time()
+
+    def resumo(self)->Dict:
+        ativo=self.motor is not None and self.t_fim is None
+        dt=(self.t_fim or time.time())-self.t0; out={c:getattr(self,c) for c in self.CAMPOS}
+        taxa=(self.ordens-self._ordens0)/dt if dt>0 else 0.0
+        out.update(motor=self.motor,n=self.n,total=self.total,ativo=ativo,decorrido=round(dt,3),ordens_por_s=round(taxa,1),
+                   colocacoes_por_s=round(self.colocacoes/dt,1) if dt>0 else 0.0,
+                   progresso=min(1.0,self.ordens/self.total) if self.total else None,
+                   eta_s=round(max(0,self.total-self.ordens)/taxa,1) if ativo and self.total and taxa>0 else None)
+        return out
+
+_metricas_bruto=_Metricas(); _metricas_mr=_Metricas()
+
+_placa_vazia_cache:Dict[Tuple[int,...],Tuple[float,int,int]]={}
+
+def _posicao_placa_vazia(w:int,h:int)->Tuple[float,int,int]:
+    """melhor_posicao de uma peça w×h numa placa nova. Só depende de (w,h) e da placa configurada (dimensões,
+    margem e preço do laser entram na chave, já que podem mudar no mesmo processo), então é calculada uma vez
+    por tamanho em cada processo."""
+    chave=(w,h,PLACA_LARGURA,PLACA_ALTURA,MARGEM,LASER_CUSTO_POR_CM)
+    r=_placa_vazia_cache.get(chave)
+    if r is None: r=_placa_vazia_cache[chave]=Placa().melhor_posicao(Peca(w,h,0)); _metricas_bruto.posicoes+=1
+    else: _metricas_bruto.cache_hits+=1
+    return r
+
+def _escolher_posicao(placas:List[Placa],p:Peca)->Tuple[float,float,int,int,int]:
+    """Passo guloso de uma peça: (custo incremental, laser, índice da placa, x, y).
+    Índice == len(placas) abre placa nova; custo inf quando a peça não cabe."""
+    m=_metricas_bruto; m.colocacoes+=1; m.posicoes+=len(placas)
+    melhor_c,best_idx,bx,by=float('inf'),None,-1,-1
+    for i,pl in enumerate(placas):
+        c,x,y=pl.melhor_posicao(p)
+        if c<melhor_c: melhor_c,best_idx,bx,by=c,i,x,y
+    c_n,x_n,y_n=_posicao_placa_vazia(p.largura,p.altura)
+    custo_nova=(PLACA_CUSTO+c_n) if c_n!=float('inf') else float('inf')
+    if custo_nova<melhor_c: return custo_nova,c_n,len(placas),x_n,y_n
+    if best_idx is None: return float('inf'),float('inf'),-1,-1,-1
+    return melhor_c,melhor_c,best_idx,bx,by
+
 def _calcular_solucao(pecas_ordenadas:List[Peca])->Tuple[List[Placa],float]:
-    placas=[Placa()]; custo_total=PLACA_CUSTO
+    """As placas vêm de _pool_placas: quem descartar o resultado pode devolvê-las com devolver_todas."""
+    placas=[_pool_placas.obter()]; custo_total=PLACA_CUSTO
     for p in pecas_ordenadas:
-        melhor_c,best_idx,bx,by=float('inf'),None,-1,-1
-        for i,pl in enumerate(placas):
-            c,x,y=pl.melhor_posicao(p)
-            if c<melhor_c: melhor_c,best_idx,bx,by=c,i,x,y
-        pl_nova=Placa(); c_n,x_n,y_n=pl_nova.melhor_posicao(p)
-        custo_nova=(PLACA_CUSTO+c_n) if c_n!=float('inf') else float('inf')
-        if custo_nova<melhor_c:
-            pl=Placa(); pl.colocar(p,x_n,y_n,custo_laser_incremental=c_n); placas.append(pl); custo_total+=PLACA_CUSTO+c_n
-        else:
-            if best_idx is None: return [], float('inf')
-            placas[best_idx].colocar(p,bx,by,custo_laser_incremental=melhor_c); custo_total+=melhor_c
+        delta,laser,idx,x,y=_escolher_posicao(placas,p)
+        if delta==float('inf'): _pool_placas.devolver_todas(placas); return [], float('inf')
+        if idx==len(placas): placas.append(_pool_placas.obter())
+        placas[idx].colocar(p,x,y,custo_laser_incremental=laser); custo_total+=delta
     return placas, custo_total
 
-def _salvar_solucao(out_dir:Path, placas:List[Placa], custo_total:float, tempo:float):
+# --------- parada cooperativa (cancelamento e orçamentos) ----------
+class _Parada:
+    """Pedido de parada de um motor: cancelar() (Api), tempo_max segundos desde a criação e/ou iteracoes_max
+    ordens avaliadas. Os laços chamam parou(iteracoes) de tempos em tempos e param quando ela devolve True;
+    `motivo` fica 'cancelado', 'tempo' ou 'iteracoes'. `iteracoes` são as ordens avaliadas além das já somadas em
+    self.iteracoes (fases anteriores). O sinal é um valor compartilhado: os workers do bb paralelo o recebem no
+    initializer e param junto com o processo principal."""
+    def __init__(self,tempo_max:float=None,iteracoes_max:int=None):
+        self.t0=time.time(); self.tempo_max=tempo_max; self.iteracoes_max=iteracoes_max
+        self.iteracoes=0; self.motivo=None; self.sinal=mp.RawValue('b',0)
+
+    def cancelar(self):
+        self._parar('cancelado')
+
+    def _parar(self,motivo:str):
+        if self.motivo is None: self.motivo=motivo
+        self.sinal.value=1
+
+    def parou(self,iteracoes:int=0)->bool:
+        if self.sinal.value: return True
+        if self.tempo_max is not None and time.time()-self.t0>=self.tempo_max: self._parar('tempo')
+        elif self.iteracoes_max is not None and self.iteracoes+iteracoes>=self.iteracoes_max: self._parar('iteracoes')
+        return bool(self.sinal.value)
+
+    def restantes(self)->int:
+        """Ordens que ainda cabem no orçamento (None = sem limite)."""
+        return None if self.iteracoes_max is None else max(0,self.iteracoes_max-self.iteracoes)
+
+class _CanalShard:
+    """Lado worker do bb paralelo: faz o papel da _Parada lendo o sinal compartilhado e publica os contadores do
+    shard k (_metricas_bruto do worker desde o início do shard, na ordem de CAMPOS) em contagem[k*N:(k+1)*N].
+    Cada shard só escreve as próprias posições; quem soma e decide é o processo principal. 'ordens' são as
+    ordens do shard já resolvidas, contadas a partir do rank0 onde ele começa."""
+    CAMPOS=('folhas','colocacoes','posicoes','cache_hits','ordens')
+    def __init__(self,sinal,contagem,k:int,rank0:int):
+        self.sinal=sinal; self.contagem=contagem; self.i=k*len(self.CAMPOS); self.rank0=rank0
+        m=_metricas_bruto; self.base=(m.folhas,m.colocacoes,m.posicoes,m.cache_hits)
+
+    def publicar(self,rank:int=None):
+        m=_metricas_bruto; c=self.contagem; i=self.i; b=self.base
+        c[i]=m.folhas-b[0]; c[i+1]=m.colocacoes-b[1]; c[i+2]=m.posicoes-b[2]; c[i+3]=m.cache_hits-b[3]
+        if rank is not None: c[i+4]=rank-self.rank0
+
+    def parou(self,iteracoes:int=0)->bool:
+        self.publicar(); return bool(self.sinal.value)
+
+    def restantes(self)->int: return None
+
+class _Interrompido(Exception):
+    """Sai da recursão do _bb_buscar quando a parada é pedida; args[0] = rank da primeira ordem não resolvida."""
+
+# --------- branch-and-bound sobre as ordens ----------
+def _area_util()->int:
+    # das dimensões atuais (benchmark e testes trocam placa e margem depois do import)
+    return (PLACA_LARGURA-2*MARGEM)*(PLACA_ALTURA-2*MARGEM)
+
+def _cota_inferior(rest_area:int,rest_perim:int,area_livre:int,exposto:int,area_util:int)->float:
+    """Custo mínimo que as peças restantes ainda vão somar (admissível).
+    Chapas: a área que não cabe no espaço livre das placas abertas exige placas novas.
+    Laser: cada cm de contato usa perímetro de uma peça restante e de outra peça; contra peças já
+    colocadas só há `exposto` cm disponíveis, então o corte restante é >= (rest_perim-exposto)/2."""
+    placas_novas=max(0,-(-(rest_area-area_livre)//area_util))
+    corte=max(0,rest_perim-exposto)/2
+    return placas_novas*PLACA_CUSTO+corte*LASER_CUSTO_POR_CM
+
+PROGRESSO_NOS=4096   # nós explorados entre chamadas de progresso(rank) no _bb_buscar
+PARADA_NOS=256       # e entre consultas à parada (tempo/cancelamento)
+
+def _bb_buscar(pecas:List[Tuple[int,int,int]], ao_melhorar=None, prefixo:Tuple[int,...]=(),
+               limite=None, podar:bool=True, distintas:bool=True, inicio:Tuple[int,...]=None,
+               fim:Tuple[int,...]=None, teto:float=float('inf'), progresso=None,
+               parada:_Parada=None)->Tuple[List[Placa],float,Dict[str,int]]:
+    """Monta as ordens peça a peça (mesma ordem lexicográfica de permutations) e poda um prefixo quando
+    custo parcial + cota inferior passa do melhor custo. Como a poda só descarta ordens que não melhoram,
+    o ótimo e a sequência de melhorias são os mesmos da enumeração completa.
+    O estado das placas é o do prefixo atual: ao voltar na árvore só a última peça é removida, então cada
+    ordem nova custa o tamanho do sufixo que mudou. podar=False percorre todas as ordens assim.
+    distintas=True percorre só as permutações distintas do multiconjunto de dimensões: em cada nível só a
+    primeira peça (menor índice) de cada (w,h) é tentada. Trocar peças iguais não muda layout nem custo, e o
+    representante escolhido é a primeira dessas ordens na sequência de permutations, então ids e melhorias
+    saem iguais aos da enumeração. As ordens puladas ficam em stats['ordens_redundantes'].
+    ao_melhorar(placas,custo,ordem) é chamado a cada melhoria estrita. `prefixo` fixa as primeiras peças
+    (um shard) e limite() devolve um incumbente externo usado só na poda.
+    inicio/fim (ordens de índices, ver _ordem_do_rank) restringem a busca à faixa [inicio, fim) da ordem
+    lexicográfica: na borda esquerda o nível começa em inicio[prof] (as dimensões das peças livres anteriores
+    contam como já vistas, como na enumeração completa) e na direita para em fim[prof]. `teto` é o custo de uma
+    solução já conhecida (só o que fica abaixo dele é melhoria) e progresso(rank) é chamado a cada PROGRESSO_NOS
+    nós com o rank da primeira ordem ainda não resolvida.
+    `parada` (_Parada/_CanalShard) é consultada a cada PARADA_NOS nós e o orçamento de iterações é conferido
+    em cada folha; ao parar, o melhor até ali é devolvido com stats['rank_parada'] (primeira ordem não resolvida,
+    ponto de retomada do checkpoint)."""
+    n=len(pecas); usados=[False]*n; ordem=[]
+    stats={'nos_explorados':0,'nos_podados':0,'folhas':0,'ordens_redundantes':0}
+    placas=[Placa()]; area_util=_area_util()
+    melhor=[teto,[]]; prox=[PARADA_NOS,PROGRESSO_NOS]; max_folhas=parada.restantes() if parada is not None else None
+    def dfs(prof:int,custo:float,corte:int,area_livre:int,p_colocado:int,rest_area:int,rest_perim:int,esq:bool,dir_:bool):
+        if prof==n:
+            if dir_: return   # a própria ordem `fim` fica fora da faixa
+            if max_folhas is not None and stats['folhas']>=max_folhas: parada.parou(stats['folhas']); raise _Interrompido(_rank_ordem(ordem,n))
+            stats['folhas']+=1; _metricas_bruto.folhas+=1
+            if custo<melhor[0]:
+                melhor[0]=custo; melhor[1]=[pl.copia() for pl in placas]
+                if ao_melhorar: ao_melhorar(melhor[1],custo,tuple(ordem))
+            return
+        if stats['nos_explorados']>=prox[0]:
+            prox[0]+=PARADA_NOS
+            if parada is not None and parada.parou(stats['folhas']): raise _Interrompido(_rank_ordem(ordem,n))
+            if progresso and stats['nos_explorados']>=prox[1]: prox[1]+=PROGRESSO_NOS; progresso(_rank_ordem(ordem,n))
+        incumbente=melhor[0] if limite is None else min(melhor[0],limite())
+        lo=inicio[prof] if esq else 0; hi=fim[prof] if dir_ else n-1
+        vistas={pecas[j][:2] for j in range(lo) if not usados[j]} if distintas and lo else set()
+        for i in (prefixo[prof],) if prof<len(prefixo) else range(lo,hi+1):
+            if usados[i]: continue
+            if distintas:
+                if pecas[i][:2] in vistas: stats['ordens_redundantes']+=math.factorial(n-prof-1); continue
+                vistas.add(pecas[i][:2])
+            w,h,pid=pecas[i]; p=Peca(w,h,pid)
+            delta,laser,idx,x,y=_escolher_posicao(placas,p)
+            stats['nos_explorados']+=1
+            if delta==float('inf'): stats['nos_podados']+=1; continue
+            corte_p=int(round(laser/LASER_CUSTO_POR_CM)); perim=2*(w+h)
+            n_corte=corte+corte_p; n_pcol=p_colocado+perim
+            n_area=area_livre-w*h+(area_util if idx==len(placas) else 0)
+            n_rarea=rest_area-w*h; n_rperim=rest_perim-perim
+            # folga: empates (inclusive ruído de ponto flutuante) são comparados na folha, como na enumeração
+            if podar and custo+delta+_cota_inferior(n_rarea,n_rperim,n_area,2*n_corte-n_pcol,area_util)>min(melhor[0],incumbente)+1e-6:
+                stats['nos_podados']+=1; continue
+            nova=idx==len(placas)
+            if nova: placas.append(_pool_placas.obter())
+            placas[idx].colocar(p,x,y,custo_laser_incremental=laser); usados[i]=True; ordem.append(i)
+            dfs(prof+1,custo+delta,n_corte,n_area,n_pcol,n_rarea,n_rperim,esq and i==lo,dir_ and i==hi)
+            usados[i]=False; ordem.pop()
+            if nova: _pool_placas.devolver(placas.pop())
+            else: placas[idx].remover()
+    try:
+        if n and parada is not None and parada.parou(): raise _Interrompido(_rank_ordem(inicio or prefixo,n))
+        if n: dfs(0,PLACA_CUSTO,0,area_util,0,sum(w*h for w,h,_ in pecas),sum(2*(w+h) for w,h,_ in pecas),inicio is not None,fim is not None)
+    except _Interrompido as e: stats['rank_parada']=e.args[0]
+    return melhor[1],melhor[0],stats
+
+# --------- layout estruturado (JSON) ----------
+# Formato compacto, o mesmo para o bruto e o MaxRect:
+#   {"dimensoes":[largura,altura,margem], "chapa":custo da chapa, "custo":total, "tempo":s,
+#    "placas":[{"laser":custo do laser, "pecas":[[id,x,y,w,h],...], "livres":[[x,y,w,h],...]}]}
+# "livres" só existe no MaxRect (o bruto não guarda retângulos livres). Os passos do MaxRect (step_NNN.json)
+# trazem só o que mudou; ver _mr_passo.
+def _layout_placas(placas:List[Placa], custo_total:float, tempo:float)->Dict:
+    return {'dimensoes':[PLACA_LARGURA,PLACA_ALTURA,MARGEM],'chapa':PLACA_CUSTO,'custo':round(custo_total,2),'tempo':round(tempo,3),
+            'placas':[{'laser':round(pl.laser_corte,2),'pecas':[[p.id,p.x,p.y,p.largura,p.altura] for p in pl.pecas]} for pl in placas]}
+
+def _gravar_json(destino:Path, dados:Dict):
+    destino.write_text(json.dumps(dados,ensure_ascii=False,separators=(',',':')),encoding='utf-8')
+
+def _salvar_solucao(out_dir:Path, placas:List[Placa], custo_total:float, tempo:float, desenho:_PoolDesenho=None,
+                    parada:_Parada=None):
+    # depois da parada (cancelamento ou orçamento) nenhum PNG novo começa: a pasta fica só com layout.json e
+    # info.txt, e a página desenha pelo layout
     out_dir.mkdir(parents=True,exist_ok=True)
-    for i,pl in enumerate(placas, start=1): _desenhar_placa_png(pl,i,out_dir/f"placa_{i:02d}.png")
+    parou=lambda: parada is not None and parada.parou()
+    if SAIDA_PNG and not parou():
+        tarefas=[([(p.id,p.x,p.y,p.largura,p.altura) for p in pl.pecas],i,out_dir/f"placa_{i:02d}.png") for i,pl in enumerate(placas, start=1)]
+        pool=desenho.obter() if desenho is not None and len(tarefas)>1 else None
+        if pool: pool.starmap(_desenhar_pecas_png,tarefas)
+        else:
+            for k,t in enumerate(tarefas):
+                if parou():
+                    for feito in tarefas[:k]: feito[2].unlink(missing_ok=True)
+                    break
+                _desenhar_pecas_png(*t)
+    _gravar_json(out_dir/"layout.json",_layout_placas(placas,custo_total,tempo))
     linhas=[f"Placas: {len(placas)}",f"Custo: R${custo_total:.2f}",f"Tempo: {tempo:.3f}s","", "[Por placa]"]
     for i,pl in enumerate(placas,start=1):
         linhas.append(f"Placa {i:02d}: Chapa R${PLACA_CUSTO:.2f} | Laser R${pl.laser_corte:.2f} | Total R${(PLACA_CUSTO+pl.laser_corte):.2f}")
     (out_dir/"info.txt").write_text("\n".join(linhas)+"\n",encoding='utf-8')
 
-def _next_solution_index()->int:
-    rx=re.compile(r"solucao\s*#\s*(\d+)$",re.I); nums=[]
-    for p in OUTPUT_DIR.glob("solucao # *"):
-        m=rx.search(p.name)
-        if m: nums.append(int(m.group(1)))
-    return (max(nums)+1) if nums else 1
+class _Publicacoes:
+    """Registro, em ordem, do que já terminou de ser gravado (frames do MaxRect, snapshots do bruto). O cursor
+    'geracao:n' diz quantos itens o leitor já tem: desde(cursor) devolve só os novos, e uma geração nova
+    (reiniciar, numa execução que apaga a saída anterior) invalida os cursores antigos. `carregar` lista o que
+    já estava no disco antes do processo começar, na primeira leitura. Com `manter` só os últimos itens ficam
+    na memória (um cursor mais antigo que eles recebe reset), e inscrever(fn) chama fn(item) a cada publicação."""
+    def __init__(self,carregar=None,manter:int=None):
+        self._lock=threading.Lock(); self._geracao=0; self._itens:List[Path]=[]; self._base=0
+        self._carregar=carregar; self._manter=manter; self._ouvintes=[]
+
+    def inscrever(self,fn):
+        self._ouvintes.append(fn)
+
+    def reiniciar(self):
+        with self._lock: self._geracao+=1; self._itens=[]; self._base=0; self._carregar=None
+
+    def publicar(self,item:Path):
+        with self._lock: self._itens.append(item); self._aparar()
+        for fn in self._ouvintes: fn(item)
+
+    def _aparar(self):
+        if self._manter is not None and len(self._itens)>self._manter:
+            corte=len(self._itens)-self._manter; del self._itens[:corte]; self._base+=corte
+
+    def _carregar_disco(self):
+        # Antes da primeira leitura nenhum cursor foi entregue, então a numeração recomeça do zero. O que já foi
+        # publicado também está no disco (só é publicado depois de gravado): a mesma pasta/arquivo, que para os
+        # snapshots é o mesmo número de solução, entra uma vez só, na posição do disco.
+        if self._carregar:
+            antes=list(self._carregar()); vistos=set(antes)
+            self._itens=antes+[i for i in self._itens if i not in vistos]; self._carregar=None
+            self._base=0; self._aparar()
+
+    def desde(self,cursor:str=None)->Tuple[str,bool,List[Path]]:
+        """(cursor atual, reset, itens novos). reset=True quando o cursor não vale mais (ou é None): aí os
+        itens são todos os da geração atual."""
+        with self._lock:
+            self._carregar_disco(); n=self._base+len(self._itens); atual=f"{self._geracao}:{n}"
+            try: g,k=map(int,str(cursor).split(':'))
+            except ValueError: g,k=-1,0
+            if g!=self._geracao or not self._base<=k<=n: return atual,True,self._itens[:]
+            return atual,False,self._itens[k-self._base:]
+
+    def ultimos(self,k:int)->List[Path]:
+        with self._lock: self._carregar_disco(); return self._itens[-k:][::-1]
+
+class _FilaRender:
+    """Desenha os snapshots de solução numa thread própria, fora do laço de busca. Só existe um pedido
+    pendente: melhorias que chegam enquanto um desenho está em andamento substituem o pendente, então
+    apenas a mais recente é desenhada e a busca nunca espera o matplotlib."""
+    def __init__(self):
+        self._cond=threading.Condition(); self._pendente=None; self._desenhando=False; self._thread=None
+
+    def enviar(self,out_dir:Path,placas:List[Placa],custo_total:float,tempo:float,desenho:_PoolDesenho=None,
+               parada:_Parada=None):
+        with self._cond:
+            self._pendente=(out_dir,placas,custo_total,tempo,desenho,parada); self._cond.notify_all(); _metricas_bruto.renders_enviados+=1
+            if self._thread is None:
+                self._thread=threading.Thread(target=self._loop,daemon=True); self._thread.start()
+
+    def esperar(self):
+        """Bloqueia até o último pedido enviado estar no disco."""
+        with self._cond:
+            while self._pendente is not None or self._desenhando: self._cond.wait()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pendente is None: self._cond.wait()
+                pedido=self._pendente; self._pendente=None; self._desenhando=True
+            try: _salvar_solucao(*pedido); _pub_solucoes.publicar(pedido[0]); _metricas_bruto.renders_concluidos+=1
+            except Exception as e: print("[RENDER] erro:", e)
+            finally:
+                with self._cond: self._desenhando=False; self._cond.notify_all()
 
-def forca_bruta_total(caminho_txt:Path):
-    pares=_parse_txt_content(caminho_txt.read_text(encoding='utf-8'))
-    pecas=[(w,h,i+1) for i,(w,h) in enumerate(pares)]
-    melhor_custo=float('inf'); melhor_placas=[]; t0=time.time(); serial=_next_solution_index()-1
-    for _,ordem in enumerate(permutations(range(len(pecas))), start=1):
-        ord_pecas=[Peca(*pecas[i]) for i in ordem]
-        placas,custo=_calcular_solucao(ord_pecas)
+_fila_render=_FilaRender()
+
+_RX_SOLUCAO=re.compile(r"solucao\s*#\s*(\d+)$",re.I)
+
+_indice_lock=threading.Lock()
+
+def _next_solution_index()->int:
+    # o disco é listado de novo a cada execução: outro processo (ou uma execução anterior) pode ter gravado
+    # snapshots na mesma pasta depois da primeira leitura de _pub_solucoes
+    with _indice_lock:
+        nums=[int(m.group(1)) for m in (_RX_SOLUCAO.search(p.name) for p in [*_solucoes_no_disco(),*_pub_solucoes.ultimos(1)]) if m]
+        return max(nums,default=0)+1
+
+# --------- shards em processos ----------
+# Shard k = ordens que começam pela peça k (bloco contíguo da ordem lexicográfica). Cada worker publica seu
+# melhor custo em _pool_incumbentes[k] e poda usando só os shards anteriores: assim nenhuma ordem que seria
+# melhoria na execução serial é descartada. Cada melhoria vai para a _pool_fila assim que é encontrada, seguida
+# de um (k, None, stats) quando o shard termina; o processo principal as junta em ordem de shard e reproduz
+# exatamente os mesmos snapshots da execução serial.
+_pool_incumbentes=None; _pool_sinal=None; _pool_contagem=None; _pool_fila=None
+
+def _bb_init_worker(incumbentes,sinal,contagem,fila,config):
+    global _pool_incumbentes,_pool_sinal,_pool_contagem,_pool_fila
+    _aplicar_config(config); _pool_incumbentes=incumbentes; _pool_sinal=sinal; _pool_contagem=contagem; _pool_fila=fila
+
+def _bb_shard(args:Tuple):
+    pecas,u,k,lo,hi,podar,distintas,teto=args; inc=_pool_incumbentes; fila=_pool_fila; n=len(pecas); f=math.factorial(n-1)
+    def _anterior()->float: return min(teto,min(inc[:u])) if u else teto
+    def _registrar(placas,custo,ordem):
+        inc[u]=custo; fila.put((u,custo,ordem))
+    # bordas da fatia [lo, hi) dentro do bloco da peça k (None = o bloco desde o começo / até o fim)
+    inicio=_ordem_do_rank(lo,n) if lo>k*f else None; fim=_ordem_do_rank(hi,n) if hi<(k+1)*f else None
+    canal=_CanalShard(_pool_sinal,_pool_contagem,u,lo)
+    try:
+        _,_,stats=_bb_buscar(pecas,ao_melhorar=_registrar,prefixo=(k,),limite=_anterior,podar=podar,distintas=distintas,
+                             inicio=inicio,fim=fim,teto=teto,progresso=canal.publicar,parada=canal)
+    except BaseException as e:
+        fila.put((u,None,e)); raise
+    canal.publicar(stats.get('rank_parada',hi))
+    fila.put((u,None,stats))
+
+def _juntar_faixas(faixas:List[Tuple[int,int]])->List[Tuple[int,int]]:
+    """Faixas [a, b) em ordem, sem as vazias e com as contíguas emendadas."""
+    out=[]
+    for a,b in faixas:
+        if a>=b: continue
+        if out and out[-1][1]==a: out[-1]=(out[-1][0],b)
+        else: out.append((a,b))
+    return out
+
+def _bb_paralelo(pecas:List[Tuple[int,int,int]], processos:int, faixas:List[Tuple[int,int]]=None, ao_melhorar=None,
+                 podar:bool=True, distintas:bool=True, teto:float=float('inf'), progresso=None,
+                 parada:_Parada=None)->Tuple[List[Placa],float,Dict[str,int]]:
+    """Resolve as faixas de ranks [a, b) (em ordem, sem sobreposição; None = todas as ordens), cada uma cortada nos blocos da peça inicial:
+    um shard por pedaço, e assim cada shard retoma de onde parou. As melhorias do primeiro shard ainda não
+    terminado (a fronteira) saem em ao_melhorar assim que chegam; as dos shards seguintes esperam todos os
+    anteriores terminarem e então saem na ordem dos shards, só as que ainda melhoram, como na execução serial.
+    progresso(pendentes,reserva) recebe, a cada consulta, as faixas ainda não resolvidas (o rank publicado por
+    cada shard em andamento até o fim dele, mais os que não começaram) e a melhor (custo, ordem) ainda adiada
+    (ou None), que um checkpoint precisa guardar. Enquanto espera, o processo principal soma os contadores dos
+    workers (_CanalShard) em _metricas_bruto e confere tempo e iterações do conjunto (o orçamento de iterações é
+    aproximado: os shards em andamento só param no próximo PARADA_NOS). Ao parar, stats['pendentes'] traz as
+    faixas que faltam e stats['rank_parada'] o começo da primeira."""
+    n=len(pecas); f=math.factorial(n-1); N=len(_CanalShard.CAMPOS); met=_metricas_bruto
+    faixas=[(0,math.factorial(n))] if faixas is None else faixas
+    melhor_custo=teto; melhor_placas=[]; stats={'nos_explorados':0,'nos_podados':0,'folhas':0,'ordens_redundantes':0}
+    shards=[]; dims=[p[:2] for p in pecas]
+    for a,b in faixas:
+        for k in range(a//f,-(-b//f)):
+            lo,hi=max(a,k*f),min(b,(k+1)*f)
+            # peça inicial que repete as dimensões de uma anterior: o bloco só teria ordens redundantes, que já
+            # contam como resolvidas
+            if distintas and dims[k] in dims[:k]: stats['ordens_redundantes']+=hi-lo; met.ordens+=hi-lo
+            elif lo<hi: shards.append((k,lo,hi))
+    if not shards: return melhor_placas,melhor_custo,stats
+    incumbentes=mp.RawArray('d',[float('inf')]*len(shards)); contagem=mp.RawArray('q',len(shards)*N); somados=[0]*N
+    def _somar()->int:
+        # soma dos contadores dos shards -> métricas, só o que mudou desde a última soma: o que o próprio processo
+        # principal conta (o layout refeito de cada melhoria) continua lá. Devolve as folhas (orçamento da parada)
+        tot=[sum(contagem[j::N]) for j in range(N)]
+        for campo,t,antes in zip(_CanalShard.CAMPOS,tot,somados): setattr(met,campo,getattr(met,campo)+t-antes)
+        somados[:]=tot; return tot[0]
+    def _publicar(custo:float,ordem:Tuple[int,...]):
+        nonlocal melhor_placas,melhor_custo
         if custo<melhor_custo:
-            melhor_custo=custo; melhor_placas=placas; serial+=1
-            _salvar_solucao(OUTPUT_DIR/f"solucao # {serial}",melhor_placas,melhor_custo,time.time()-t0)
-    if melhor_placas: _salvar_solucao(OUTPUT_DIR/"solucao final",melhor_placas,melhor_custo,time.time()-t0)
+            # refaz o layout no processo principal (mesma sequência de somas -> mesmo custo)
+            melhor_placas,melhor_custo=_calcular_solucao([Peca(*pecas[i]) for i in ordem])
+            if ao_melhorar: ao_melhorar(melhor_placas,melhor_custo,ordem)
+    def _pendentes()->List[Tuple[int,int]]:
+        # rank publicado por cada shard não terminado: tudo antes dele, naquele shard, está resolvido
+        return _juntar_faixas([(paradas.get(u,lo+contagem[u*N+N-1]),hi) for u,(k,lo,hi) in enumerate(shards) if u not in terminados or u in paradas])
+    def _reserva():
+        adiada=[m for lista in adiadas.values() for m in lista]
+        return min(adiada,key=lambda m: m[0]) if adiada else None
+    ctx=_contexto_mp(); fila=ctx.Queue(); sinal=parada.sinal if parada is not None else mp.RawValue('b',0)
+    adiadas={u:[] for u in range(len(shards))}; terminados=set(); paradas={}; fronteira=0; erro=None
+    with ctx.Pool(min(processos,len(shards)),initializer=_bb_init_worker,
+                  initargs=(incumbentes,sinal,contagem,fila,_config_worker())) as pool:
+        pool.map_async(_bb_shard,[(pecas,u,k,lo,hi,podar,distintas,teto) for u,(k,lo,hi) in enumerate(shards)],chunksize=1)
+        while len(terminados)<len(shards):
+            try: u,custo,dado=fila.get(timeout=0.1)
+            except queue.Empty:
+                folhas=_somar()
+                if parada is not None: parada.parou(folhas)
+                if progresso: progresso(_pendentes(),_reserva())
+                continue
+            if custo is not None:
+                if u==fronteira: _publicar(custo,dado)
+                else: adiadas[u].append((custo,dado))
+                continue
+            terminados.add(u)
+            if isinstance(dado,BaseException): erro=erro or dado; sinal.value=1; continue
+            for chave in ('nos_explorados','nos_podados','folhas','ordens_redundantes'): stats[chave]+=dado[chave]
+            if 'rank_parada' in dado: paradas[u]=dado['rank_parada']
+            folhas=_somar()
+            if parada is not None: parada.parou(folhas)
+            # a fronteira anda sobre os shards terminados; as melhorias adiadas deles (e da nova fronteira) saem
+            # agora, em ordem de shard
+            while fronteira<len(shards) and fronteira in terminados:
+                fronteira+=1
+                if fronteira<len(shards):
+                    for custo,ordem in adiadas.pop(fronteira): _publicar(custo,ordem)
+            if progresso: progresso(_pendentes(),_reserva())
+    if erro is not None: raise erro
+    if paradas:
+        # parado: o que os shards seguintes acharam também é solução válida, então entra no resultado
+        for u in sorted(adiadas):
+            for custo,ordem in adiadas[u]: _publicar(custo,ordem)
+        stats['pendentes']=_pendentes(); stats['rank_parada']=stats['pendentes'][0][0]
+    return melhor_placas,melhor_custo,stats
+
+# --------- rank das ordens: checkpoint e faixas ----------
+# Rank = posição da ordem na sequência lexicográfica de permutations(range(n)) (código de Lehmer). Todos os modos
+# percorrem as ordens nessa sequência, então "rank r alcançado" quer dizer que as ordens < r já foram resolvidas,
+# e uma faixa [inicio, fim) de ranks é um pedaço independente da busca (outra máquina, outro processo).
+def _rank_ordem(ordem:List[int], n:int)->int:
+    """Rank de `ordem`; um prefixo vale como a primeira ordem que começa por ele."""
+    usados=[False]*n; r=0
+    for p,i in enumerate(ordem):
+        r+=sum(1 for j in range(i) if not usados[j])*math.factorial(n-1-p); usados[i]=True
+    return r
+
+def _ordem_do_rank(r:int, n:int)->Tuple[int,...]:
+    restantes=list(range(n)); ordem=[]
+    for p in range(n):
+        q,r=divmod(r,math.factorial(n-1-p)); ordem.append(restantes.pop(q))
+    return tuple(ordem)
+
+def faixa_de_ranks(n:int, parte:int, partes:int)->Tuple[int,int]:
+    """[inicio, fim) da parte `parte` (1..partes) das n! ordens divididas em partes quase iguais."""
+    total=math.factorial(n); return total*(parte-1)//partes, total*parte//partes
+
+def _permutacoes_faixa(n:int, inicio:int, fim:int):
+    """permutations(range(n)) só nos ranks [inicio, fim), sem percorrer os anteriores: cada bloco alinhado de m!
+    ordens com o mesmo prefixo sai inteiro de permutations."""
+    r=inicio
+    while r<fim:
+        m=1
+        while m<n and r%math.factorial(m+1)==0 and r+math.factorial(m+1)<=fim: m+=1
+        base=_ordem_do_rank(r,n)
+        for sufixo in permutations(base[n-m:]): yield base[:n-m]+sufixo
+        r+=math.factorial(m)
+
+def _chave_checkpoint(pares:List[Tuple[int,int]], inicio:int, fim:int)->str:
+    # entrada, faixa e tudo que muda o custo de uma ordem
+    dados=json.dumps([pares,inicio,fim,PLACA_LARGURA,PLACA_ALTURA,MARGEM,PLACA_CUSTO,LASER_CUSTO_POR_CM])
+    return hashlib.sha1(dados.encode('utf-8')).hexdigest()[:16]
+
+def _ler_checkpoint(chave:str)->Dict:
+    try: return json.loads((CHECKPOINT_DIR/f"{chave}.json").read_text(encoding='utf-8'))
+    except (OSError,ValueError): return None
+
+def _gravar_checkpoint(chave:str, dados:Dict):
+    # troca atômica: um processo morto no meio da gravação deixa o checkpoint anterior intacto
+    CHECKPOINT_DIR.mkdir(parents=True,exist_ok=True); tmp=CHECKPOINT_DIR/f"{chave}.tmp"
+    _gravar_json(tmp,dados); os.replace(tmp,CHECKPOINT_DIR/f"{chave}.json")
+
+def _apagar_checkpoint(chave:str):
+    try: (CHECKPOINT_DIR/f"{chave}.json").unlink()
+    except OSError: pass
+
+def forca_bruta_total(caminho_txt:Path, modo:str=None, processos:int=None, renderizar:bool=True,
+                      inicio:int=0, fim:int=None, checkpoint:bool=True, parada:_Parada=None)->Dict:
+    """Resolve a entrada e grava os snapshots 'solucao # N' e a 'solucao final' (renderizar=False não grava
+    nada). Devolve as estatísticas da busca com 'melhor_custo' e 'melhor_placas'.
+    inicio/fim limitam a busca aos ranks [inicio, fim) (ver faixa_de_ranks). Com checkpoint (e CHECKPOINT_S>0) as
+    faixas de ranks ainda não resolvidas (no paralelo, o que falta de cada shard) e a melhor ordem vão para
+    CHECKPOINT_DIR a cada CHECKPOINT_S segundos, e uma execução com a mesma entrada e faixa continua de onde o
+    checkpoint parou, cada shard do seu rank; ao terminar ele é apagado.
+    `parada` (_Parada) interrompe a busca por cancelamento ou orçamento: a melhor solução até ali vira a 'solucao
+    final' (só layout.json e info.txt, sem PNG), stats['interrompido'] guarda o motivo, stats['pendentes'] as faixas
+    que faltam (stats['rank_parada'] o começo da primeira) e o checkpoint fica no ponto da parada, pronto para
+    retomar."""
+    with _PoolDesenho() as desenho:
+        try: return _forca_bruta_total(caminho_txt,modo,processos,renderizar,inicio,fim,checkpoint,parada,desenho)
+        finally: _fila_render.esperar()   # nenhum snapshot desta execução fica para depois de o pool fechar
+
+def _forca_bruta_total(caminho_txt:Path, modo:str, processos:int, renderizar:bool, inicio:int, fim:int,
+                       checkpoint:bool, parada:_Parada, desenho:_PoolDesenho)->Dict:
+    pares=_parse_txt_content(caminho_txt.read_text(encoding='utf-8'))
+    pecas=[(w,h,i+1) for i,(w,h) in enumerate(pares)]; n=len(pecas)
+    fim=math.factorial(n) if fim is None else min(fim,math.factorial(n)); inicio=min(max(0,inicio),fim)
+    melhor_custo=float('inf'); melhor_placas=[]; melhor_ordem=None; t0=time.time(); serial=_next_solution_index()-1
+    stats={}; processos=BRUTO_PROCESSOS if processos is None else processos; inicio_faixa=inicio
+    chave=_chave_checkpoint(pares,inicio,fim) if checkpoint and CHECKPOINT_S>0 else None
+    ck=_ler_checkpoint(chave) if chave else None
+    # faixas de ranks [a, b) ainda não resolvidas; um checkpoint do bb paralelo guarda as de cada shard
+    pendentes=[(inicio,fim)] if inicio<fim else []
+    if ck and inicio<=ck.get('rank',-1)<=fim:
+        salvas=[tuple(f) for f in ck.get('pendentes',[(ck['rank'],fim)])]
+        if all(inicio<=a<b<=fim for a,b in salvas):
+            pendentes=salvas; t0-=ck.get('tempo',0)
+            if ck.get('ordem'):
+                melhor_ordem=tuple(ck['ordem']); melhor_placas,melhor_custo=_calcular_solucao([Peca(*pecas[i]) for i in melhor_ordem])
+            stats['retomado_de']=pendentes[0][0] if pendentes else fim
+    total=fim-inicio_faixa
+    met=_metricas_bruto; met.reiniciar('bruto',n,total,feitas=total-sum(b-a for a,b in pendentes))
+    ultimo_ck=time.time()
+    def _progresso(faixas:List[Tuple[int,int]],reserva:Tuple[float,Tuple[int,...]]=None):
+        met.ordens=max(met.ordens,total-sum(b-a for a,b in faixas))   # no paralelo os shards já somaram até além daqui
+        if chave is not None and time.time()-ultimo_ck>=CHECKPOINT_S: _checkpoint(faixas,reserva)
+    def _checkpoint(faixas:List[Tuple[int,int]],reserva:Tuple[float,Tuple[int,...]]=None):
+        # reserva: melhoria que o bb paralelo ainda segura (shard depois da fronteira); resolvida, ela vale
+        nonlocal ultimo_ck
+        ultimo_ck=time.time(); placas,custo,ordem=melhor_placas,melhor_custo,melhor_ordem
+        if reserva and reserva[0]<custo:
+            ordem=reserva[1]; placas,custo=_calcular_solucao([Peca(*pecas[i]) for i in ordem])
+        _gravar_checkpoint(chave,{'entrada':chave,'inicio':inicio_faixa,'fim':fim,'rank':faixas[0][0] if faixas else fim,
+                                  'pendentes':[list(f) for f in faixas],'tempo':ultimo_ck-t0,'custo':custo,
+                                  'ordem':list(ordem) if ordem else None,'layout':_layout_placas(placas,custo,ultimo_ck-t0)})
+    def _nova_melhor(placas:List[Placa],custo:float,ordem:Tuple[int,...]=None):
+        nonlocal serial,melhor_placas,melhor_custo,melhor_ordem
+        serial+=1; melhor_placas,melhor_custo,melhor_ordem=placas,custo,ordem
+        if renderizar: _fila_render.enviar(OUTPUT_DIR/f"solucao # {serial}",placas,custo,time.time()-t0,desenho,parada)
+    if (modo or MODO_BRUTO)=='permutacoes':
+        feitas=0
+        for f,(a,b) in enumerate(pendentes):
+            for rank,ordem in enumerate(_permutacoes_faixa(n,a,b), start=a):
+                if parada is not None and parada.parou(feitas): stats['pendentes']=[(rank,b)]+pendentes[f+1:]; break
+                if not rank&0xFFF: _progresso([(rank,b)]+pendentes[f+1:])
+                ord_pecas=[Peca(*pecas[i]) for i in ordem]
+                placas,custo=_calcular_solucao(ord_pecas)
+                if custo<melhor_custo: _nova_melhor(placas,custo,ordem)
+                else: _pool_placas.devolver_todas(placas)   # as publicadas (fila de render) nunca voltam ao pool
+                met.ordens+=1; met.folhas+=1; feitas+=1
+            if 'pendentes' in stats: break
+    elif pendentes:
+        podar=(modo or MODO_BRUTO)!='dfs'   # ambos percorrem só as permutações distintas das dimensões
+        if processos>1 and n>1 and sum(b-a for a,b in pendentes)>=BRUTO_MIN_ORDENS_PARALELO:
+            stats.update(_bb_paralelo(pecas,processos,pendentes,ao_melhorar=_nova_melhor,podar=podar,teto=melhor_custo,
+                                      progresso=_progresso,parada=parada)[2])
+        else:
+            for f,(a,b) in enumerate(pendentes):
+                resto=pendentes[f+1:]
+                st=_bb_buscar(pecas,ao_melhorar=_nova_melhor,podar=podar,inicio=_ordem_do_rank(a,n) if a else None,
+                              fim=_ordem_do_rank(b,n) if b<math.factorial(n) else None,teto=melhor_custo,
+                              progresso=lambda r: _progresso([(r,b)]+resto),parada=parada)[2]
+                for campo in ('nos_explorados','nos_podados','folhas','ordens_redundantes'): stats[campo]=stats.get(campo,0)+st[campo]
+                if 'rank_parada' in st: stats['pendentes']=[(st['rank_parada'],b)]+resto; break
+                if parada is not None: parada.iteracoes+=st['folhas']   # o orçamento vale para todas as faixas
+    if 'pendentes' in stats:
+        stats['rank_parada']=stats['pendentes'][0][0]; stats['interrompido']=parada.motivo
+        if chave: _checkpoint(stats['pendentes'])
+    else:
+        met.ordens=total
+        if chave: _apagar_checkpoint(chave)
+    met.terminar()
+    stats['melhor_custo']=melhor_custo; stats['melhor_placas']=melhor_placas
+    if not renderizar: return stats
+    tempo=time.time()-t0; _fila_render.esperar()   # o último snapshot pendente sai antes do final
+    if melhor_placas: _salvar_solucao(OUTPUT_DIR/"solucao final",melhor_placas,melhor_custo,tempo,desenho,parada)
+    return stats
 
 # watcher BRUTO
-_cache_lock=threading.Lock()
-_cache:Dict[Path,Dict]={}
-def _dir_latest_mtime(p:Path)->float:
-    mt=p.stat().st_mtime
-    for c in p.glob("*"):
-        try: mt=max(mt,c.stat().st_mtime)
-        except: pass
-    return mt
+SOLUCOES_CACHE_MAX=8                   # pastas de solução mantidas em memória (LRU)
+SOLUCOES_CACHE_BYTES=64*1024*1024      # e no máximo tantos bytes de data URIs
+
+class _CacheSolucoes:
+    """Conteúdo (data URIs + info + layout) das pastas de solução, com despejo LRU por quantidade e por bytes. Um
+    snapshot só é lido depois de publicado completo e não muda mais, então a entrada vale até a pasta ser
+    publicada de novo (invalidar) ou despejada; nenhuma leitura precisa de stat."""
+    def __init__(self,max_itens:int,max_bytes:int):
+        self._lock=threading.Lock(); self._itens:'OrderedDict[Path,Dict]'=OrderedDict(); self._bytes=0
+        self.max_itens=max_itens; self.max_bytes=max_bytes; self.acertos=0; self.faltas=0
+
+    def obter(self,p:Path)->Dict:
+        with self._lock:
+            d=self._itens.get(p)
+            if d is not None: self._itens.move_to_end(p); self.acertos+=1; return d
+            self.faltas+=1
+        imgs=[]
+        for f in sorted(p.glob("*.png")):
+            b64=base64.b64encode(f.read_bytes()).decode('ascii'); imgs.append(f"data:image/png;base64,{b64}")
+        info=(p/"info.txt").read_text(encoding='utf-8') if (p/"info.txt").exists() else ""
+        txt=(p/"layout.json").read_text(encoding='utf-8') if (p/"layout.json").exists() else ""
+        d={'images':imgs,'info':info,'layout':json.loads(txt) if txt else None,'bytes':sum(map(len,imgs))+len(info)+len(txt)}
+        with self._lock:
+            antigo=self._itens.pop(p,None)
+            if antigo: self._bytes-=antigo['bytes']
+            self._itens[p]=d; self._bytes+=d['bytes']
+            while len(self._itens)>1 and (len(self._itens)>self.max_itens or self._bytes>self.max_bytes):
+                _,fora=self._itens.popitem(last=False); self._bytes-=fora['bytes']
+        return d
+
+    def invalidar(self,p:Path):
+        with self._lock:
+            d=self._itens.pop(p,None)
+            if d: self._bytes-=d['bytes']
+
+    def contadores(self)->Dict:
+        with self._lock: return {'itens':len(self._itens),'bytes':self._bytes,'acertos':self.acertos,'faltas':self.faltas}
+
+_cache_solucoes=_CacheSolucoes(SOLUCOES_CACHE_MAX,SOLUCOES_CACHE_BYTES)
+
 def _load_solution_dir(p:Path)->Dict:
-    with _cache_lock:
-        mt=_dir_latest_mtime(p); entry=_cache.get(p)
-        if entry and abs(entry['mt']-mt)<1e-6: return entry
-    imgs=[]
-    for f in sorted(p.glob("*.png")):
-        b64=base64.b64encode(f.read_bytes()).decode('ascii'); imgs.append(f"data:image/png;base64,{b64}")
-    info=(p/"info.txt").read_text(encoding='utf-8') if (p/"info.txt").exists() else ""
-    data={'mt':mt,'images':imgs,'info':info}
-    with _cache_lock: _cache[p]=data
-    return data
-def _pick_last_two()->Tuple[Path,Path]:
-    rx=re.compile(r"solucao\s*#\s*(\d+)$",re.I); nums=[]
+    return _cache_solucoes.obter(p)
+
+def _solucoes_no_disco()->List[Path]:
+    nums=[]
     for p in OUTPUT_DIR.glob("solucao # *"):
-        m=rx.search(p.name)
+        m=_RX_SOLUCAO.search(p.name)
         if m: nums.append((int(m.group(1)),p))
-    if not nums: return (None,None)
-    nums.sort(key=lambda t:t[0],reverse=True); return nums[0][1], (nums[1][1] if len(nums)>1 else None)
+    return [p for _,p in sorted(nums)]
+
+# snapshots 'solucao # N' completos, publicados pela fila de render (o leitor só precisa dos dois últimos;
+# o disco é listado uma única vez, na primeira leitura)
+_pub_solucoes=_Publicacoes(_solucoes_no_disco,manter=2)
+_pub_solucoes.inscrever(_cache_solucoes.invalidar)
 
 # ============================================================
 # ==============  MAXRECT (HEURÍSTICA)  ======================
@@ -575,6 +1474,11 @@ def _pick_last_two()->Tuple[Path,Path]:
 THIN_GAP_CM=6
 THIN_PENAL=0.25
 RAND_RESTARTS=4
+MR_PROCESSOS=os.cpu_count() or 1   # processos que avaliam as ordens do MaxRect (1 = serial)
+MR_MIN_COLOCACOES_PARALELO=10000   # ordens×peças abaixo disso rodam em série (~2 s): o pool custa mais que a busca
+MR_OTIMIZAR_S=0.0    # segundos de recozimento simulado depois das ordens fixas (0 = desligado)
+MR_SA_T0=2.0         # temperatura inicial/final do recozimento, em R$ de diferença de custo
+MR_SA_TF=0.01
 
 class MRPiece:
     def __init__(self,w:int,h:int,pid:int):
@@ -582,43 +1486,162 @@ class MRPiece:
 
 class MRFreeRect:
     def __init__(self,x:int,y:int,w:int,h:int):
-        self.x=x; self.y=y; self.w=w; self.h=h
+        self.x=x; self.y=y; self.w=w; self.h=h; self.ord=-1   # posição na lista do MRFreeIndex
     def fits(self,w:int,h:int)->bool: return (w<=self.w) and (h<=self.h)
     def as_tup(self): return (self.x,self.y,self.w,self.h)
 
 def _intersect(a:MRFreeRect,b:MRFreeRect)->bool:
     return not (a.x+a.w<=b.x or b.x+b.w<=a.x or a.y+a.h<=b.y or b.y+b.h<=a.y)
 
+def _contains(s:MRFreeRect,r:MRFreeRect)->bool:
+    return r.x>=s.x and r.y>=s.y and r.x+r.w<=s.x+s.w and r.y+r.h<=s.y+s.h
+
+class MRFreeIndex:
+    """Lista de retângulos livres de uma placa (a ordem da lista desempata best_position e é a do desenho)
+    com dois índices por cima:
+    - grade de células CELL×CELL: cada retângulo fica em todas as células que cobre. Interseção com a peça
+      olha só as células da peça; quem contém r tem que conter o canto (r.x,r.y), então basta uma célula.
+    - baldes por largura e por altura (com as chaves ordenadas): best_position pega só os retângulos de
+      menor short_fit."""
+    CELL=40
+
+    def __init__(self,rects:List[MRFreeRect]):
+        self.reset(rects)
+
+    def reset(self,rects:List[MRFreeRect]):
+        self.rects:List[MRFreeRect]=[]; self._cells:Dict[Tuple[int,int],set]={}
+        self._by_w:Dict[int,set]={}; self._by_h:Dict[int,set]={}; self._ws:List[int]=[]; self._hs:List[int]=[]
+        for r in rects: self._add(r)
+        self._renumber(list(rects))
+
+    def __iter__(self): return iter(self.rects)
+    def __len__(self)->int: return len(self.rects)
+
+    def _cell_keys(self,x:int,y:int,w:int,h:int):
+        C=self.CELL
+        return [(cx,cy) for cy in range(y//C,(y+h-1)//C+1) for cx in range(x//C,(x+w-1)//C+1)]
+
+    def _add(self,r:MRFreeRect):
+        for c in self._cell_keys(r.x,r.y,r.w,r.h): self._cells.setdefault(c,set()).add(r)
+        for baldes,chaves,v in ((self._by_w,self._ws,r.w),(self._by_h,self._hs,r.h)):
+            b=baldes.get(v)
+            if b is None: b=baldes[v]=set(); bisect.insort(chaves,v)
+            b.add(r)
+
+    def _remove(self,r:MRFreeRect):
+        for c in self._cell_keys(r.x,r.y,r.w,r.h): self._cells[c].discard(r)
+        for baldes,chaves,v in ((self._by_w,self._ws,r.w),(self._by_h,self._hs,r.h)):
+            b=baldes[v]; b.discard(r)
+            if not b: del baldes[v]; del chaves[bisect.bisect_left(chaves,v)]
+
+    def _renumber(self,rects:List[MRFreeRect]):
+        for k,r in enumerate(rects): r.ord=k
+        self.rects=rects
+
+    def intersecting(self,q:MRFreeRect)->set:
+        out=set(); cells=self._cells
+        for c in self._cell_keys(q.x,q.y,q.w,q.h):
+            for r in cells.get(c,()):
+                if r not in out and _intersect(r,q): out.add(r)
+        return out
+
+    def _contained(self,r:MRFreeRect)->bool:
+        C=self.CELL
+        for s in self._cells.get((r.x//C,r.y//C),()):
+            if _contains(s,r): return True
+        return False
+
+    def split(self,placed:MRFreeRect):
+        """Mesmo resultado (e mesma ordem) do corte + poda de contidos em todos-contra-todos: depois de cada
+        poda nenhum livre contém outro, então só os filhos novos podem estar contidos em alguém."""
+        hit=self.intersecting(placed)
+        if not hit: return
+        filhos:Dict[MRFreeRect,List[MRFreeRect]]={}
+        for fr in hit:
+            out=[]
+            if placed.x>fr.x: out.append(MRFreeRect(fr.x,fr.y,placed.x-fr.x,fr.h))
+            if placed.x+placed.w<fr.x+fr.w:
+                out.append(MRFreeRect(placed.x+placed.w,fr.y,fr.x+fr.w-(placed.x+placed.w),fr.h))
+            if placed.y>fr.y: out.append(MRFreeRect(fr.x,fr.y,fr.w,placed.y-fr.y))
+            if placed.y+placed.h<fr.y+fr.h:
+                out.append(MRFreeRect(fr.x,placed.y+placed.h,fr.w,fr.y+fr.h-(placed.y+placed.h)))
+            filhos[fr]=out
+        for fr in hit: self._remove(fr)
+        novos=[c for fr in hit for c in filhos[fr]]
+        # contido num livre que ficou ou em outro filho (iguais se eliminam mutuamente, como na poda original)
+        fora=set()
+        for c in novos:
+            if self._contained(c): fora.add(c); continue
+            for d in novos:
+                if d is not c and _contains(d,c): fora.add(c); break
+        rects=[]
+        for fr in self.rects:
+            if fr not in hit: rects.append(fr); continue
+            for c in filhos[fr]:
+                if c not in fora: rects.append(c); self._add(c)
+        self._renumber(rects)
+
+    def best_short_fit(self,w:int,h:int)->List[MRFreeRect]:
+        """Retângulos onde w×h cabe com o menor min(folga horizontal, folga vertical): com folga s, ou r.w==w+s
+        (e r.h>=h+s) ou r.h==h+s (e r.w>=w+s)."""
+        ws,hs=self._ws,self._hs; i=bisect.bisect_left(ws,w); j=bisect.bisect_left(hs,h)
+        while i<len(ws) or j<len(hs):
+            s=min(ws[i]-w if i<len(ws) else math.inf, hs[j]-h if j<len(hs) else math.inf)
+            achados=[r for r in self._by_w.get(w+s,()) if r.h>=h+s]
+            achados+=[r for r in self._by_h.get(h+s,()) if r.w>=w+s and r.w!=w+s]
+            if achados: return achados
+            if i<len(ws) and ws[i]-w==s: i+=1
+            if j<len(hs) and hs[j]-h==s: j+=1
+        return []
+
+class MREdgeIndex:
+    """Arestas das peças colocadas numa direção, agrupadas pela linha em que estão: linha -> intervalos
+    [a,b) ordenados e disjuntos (peças do mesmo lado de uma linha não se sobrepõem) + soma acumulada dos
+    comprimentos. O trecho de [a,b) coberto numa linha sai de duas buscas binárias."""
+    def __init__(self):
+        self.lines:Dict[int,Tuple[List[int],List[int],List[int]]]={}
+
+    def add(self,line:int,a:int,b:int):
+        d=self.lines.get(line)
+        if d is None: d=self.lines[line]=([],[],[0])
+        starts,ends,pre=d; i=bisect.bisect_left(starts,a)
+        starts.insert(i,a); ends.insert(i,b); pre.append(0)
+        for k in range(i,len(starts)): pre[k+1]=pre[k]+ends[k]-starts[k]
+
+    def overlap(self,line:int,a:int,b:int)->int:
+        d=self.lines.get(line)
+        if d is None: return 0
+        starts,ends,pre=d
+        i=bisect.bisect_right(ends,a); j=bisect.bisect_left(starts,b)
+        if i>=j: return 0
+        return pre[j]-pre[i]-max(0,a-starts[i])-max(0,ends[j-1]-b)
+
+    def clear(self):
+        self.lines.clear()
+
 class MRPlate:
     def __init__(self,idx:int):
         self.idx=idx; self.W=PLACA_LARGURA; self.H=PLACA_ALTURA
         usable=MRFreeRect(MARGEM,MARGEM,self.W-2*MARGEM,self.H-2*MARGEM)
-        self.free=[usable]; self.placed:List[MRPiece]=[]
-        self.grid=[[False]*self.W for _ in range(self.H)]
+        self.free=MRFreeIndex([usable]); self.placed:List[MRPiece]=[]
+        # arestas por lado da peça: _tops[y] = peças com y+h==y, _bottoms[y] = peças que começam em y, etc.
+        self._tops=MREdgeIndex(); self._bottoms=MREdgeIndex(); self._rights=MREdgeIndex(); self._lefts=MREdgeIndex()
+        self.laser_cost=0.0
+
+    def limpar(self):
+        self.free.reset([MRFreeRect(MARGEM,MARGEM,self.W-2*MARGEM,self.H-2*MARGEM)]); self.placed=[]
+        for e in (self._tops,self._bottoms,self._rights,self._lefts): e.clear()
         self.laser_cost=0.0
 
-    def _mark_grid(self,x:int,y:int,w:int,h:int,val=True):
-        for yy in range(y,y+h):
-            row=self.grid[yy]
-            for xx in range(x,x+w): row[xx]=val
+    def _add_edges(self,x:int,y:int,w:int,h:int):
+        self._bottoms.add(y,x,x+w); self._tops.add(y+h,x,x+w)
+        self._lefts.add(x,y,y+h); self._rights.add(x+w,y,y+h)
 
     def _shared_border(self,x:int,y:int,w:int,h:int)->int:
-        comp=0
-        if y>0:
-            row=self.grid[y-1]
-            for xx in range(x,x+w):
-                if row[xx]: comp+=1
-        if y+h<self.H:
-            row=self.grid[y+h]
-            for xx in range(x,x+w):
-                if row[xx]: comp+=1
-        if x>0:
-            for yy in range(y,y+h):
-                if self.grid[yy][x-1]: comp+=1
-        if x+w<self.W:
-            for yy in range(y,y+h):
-                if self.grid[yy][x+w]: comp+=1
-        return comp
+        # Uma célula vizinha ocupada só pode ser de peça com a aresta oposta exatamente nessa linha: qualquer
+        # outra peça que cobrisse a célula invadiria o candidato (que está num retângulo livre).
+        return (self._tops.overlap(y,x,x+w)+self._bottoms.overlap(y+h,x,x+w)
+                +self._rights.overlap(x,y,y+h)+self._lefts.overlap(x+w,y,y+h))
 
     def _wall_contact(self,x:int,y:int,w:int,h:int)->int:
         c=0
@@ -629,24 +1652,7 @@ class MRPlate:
         return c
 
     def _split_free_rectangles(self, placed:MRFreeRect):
-        out=[]
-        for fr in self.free:
-            if not _intersect(fr,placed): out.append(fr); continue
-            if placed.x>fr.x: out.append(MRFreeRect(fr.x,fr.y,placed.x-fr.x,fr.h))
-            if placed.x+placed.w<fr.x+fr.w:
-                out.append(MRFreeRect(placed.x+placed.w,fr.y,fr.x+fr.w-(placed.x+placed.w),fr.h))
-            if placed.y>fr.y: out.append(MRFreeRect(fr.x,fr.y,fr.w,placed.y-fr.y))
-            if placed.y+placed.h<fr.y+fr.h:
-                out.append(MRFreeRect(fr.x,placed.y+placed.h,fr.w,fr.y+fr.h-(placed.y+placed.h)))
-        # prune contidos
-        pruned=[]
-        for i,r in enumerate(out):
-            contained=False
-            for j,s in enumerate(out):
-                if i==j: continue
-                if (r.x>=s.x and r.y>=s.y and r.x+r.w<=s.x+s.w and r.y+r.h<=s.y+s.h): contained=True; break
-            if not contained and r.w>0 and r.h>0: pruned.append(r)
-        self.free=pruned
+        self.free.split(placed)
 
     def _thin_penalty(self,leftover_h:int,leftover_v:int)->float:
         pen=0.0
@@ -656,9 +1662,9 @@ class MRPlate:
 
     def best_position(self, piece:MRPiece):
         best_score=None; best=(float('inf'),-1,-1,-1,None)
-        for k,fr in enumerate(self.free):
-            if not fr.fits(piece.w,piece.h): continue
-            x,y=fr.x,fr.y
+        # só os de menor short_fit (1º critério do score), na ordem da lista para o desempate
+        for fr in sorted(self.free.best_short_fit(piece.w,piece.h),key=lambda r:r.ord):
+            x,y,k=fr.x,fr.y,fr.ord
             leftover_h=fr.w-piece.w; leftover_v=fr.h-piece.h
             short_fit=min(leftover_h,leftover_v); long_fit=max(leftover_h,leftover_v)
             shared=self._shared_border(x,y,piece.w,piece.h); walls=self._wall_contact(x,y,piece.w,piece.h)
@@ -675,84 +1681,183 @@ class MRPlate:
         old_free=[MRFreeRect(r.x,r.y,r.w,r.h) for r in self.free]
         # coloca
         piece.x,piece.y=x,y; piece.plate_index=self.idx
-        self.placed.append(piece); self._mark_grid(x,y,piece.w,piece.h,True)
+        self.placed.append(piece); self._add_edges(x,y,piece.w,piece.h)
         placed_rect=MRFreeRect(x,y,piece.w,piece.h)
         self._split_free_rectangles(placed_rect)
         self.laser_cost+=float(laser_inc)
         new_free=[MRFreeRect(r.x,r.y,r.w,r.h) for r in self.free]
         return placed_rect, old_free, new_free
 
+_pool_mr=_PoolPlacas(lambda: MRPlate(0),lambda pl: (pl.W,pl.H)==(PLACA_LARGURA,PLACA_ALTURA))
+
+def _mr_nova_placa(idx:int)->MRPlate:
+    pl=_pool_mr.obter(); pl.idx=idx; return pl
+
+# frames e passos JSON (na ordem em que foram gravados) e o info.txt da execução desenhada
+_pub_maxrect=_Publicacoes(lambda: sorted([*MAXRECT_DIR.glob("*.png"),*MAXRECT_DIR.glob("step_*.json")]))
+
+def _layout_mr(plates:List[MRPlate], custo_total:float, tempo:float)->Dict:
+    return {'dimensoes':[PLACA_LARGURA,PLACA_ALTURA,MARGEM],'chapa':PLACA_CUSTO,'custo':round(custo_total,2),'tempo':round(tempo,3),
+            'placas':[{'laser':round(pl.laser_cost,2),'pecas':[[p.id,p.x,p.y,p.w,p.h] for p in pl.placed],
+                       'livres':[list(fr.as_tup()) for fr in pl.free]} for pl in plates]}
+
+def _mr_passo(step:int, plate_idx:int, nova:bool, pl:MRPlate, piece:MRPiece,
+              old_free:List[MRFreeRect], new_free:List[MRFreeRect])->Dict:
+    """Delta de um passo: placa (índice; nova=True quando abriu agora, com o livre inicial da margem), a peça
+    colocada, os livres que saíram/entraram e os livres e o laser da placa depois do passo. Aplicando os passos
+    em ordem a partir de nenhuma placa, o cliente remonta todos os estados desenhados em pre/split/after."""
+    old_set={fr.as_tup() for fr in old_free}; new_set={fr.as_tup() for fr in new_free}
+    return {'passo':step,'placa':plate_idx,'nova':nova,'peca':[piece.id,piece.x,piece.y,piece.w,piece.h],
+            'removidos':[list(t) for t in sorted(old_set-new_set)],'novos':[list(t) for t in sorted(new_set-old_set)],
+            'livres':[list(fr.as_tup()) for fr in pl.free],'laser':round(pl.laser_cost,2)}
+
 # --------- desenho DEBUG forte (pre/split/after) ----------
-def _draw_cuts(ax, placed:MRFreeRect, fr_list:List[MRFreeRect]):
-    # desenha linhas laranja nas bordas do 'placed' dentro das interseções
+def _draw_cuts(ax, placed:MRFreeRect, fr_list:List[MRFreeRect])->list:
+    # desenha linhas laranja nas bordas do 'placed' dentro das interseções (devolve as linhas criadas)
+    linhas=[]
     for fr in fr_list:
         if not _intersect(fr, placed): continue
         # verticals
         x1=placed.x; x2=placed.x+placed.w
         y_low=max(fr.y, placed.y); y_high=min(fr.y+fr.h, placed.y+placed.h)
-        ax.plot([x1,x1],[y_low,y_high], linewidth=2.0, color='#f97316')
-        ax.plot([x2,x2],[y_low,y_high], linewidth=2.0, color='#f97316')
+        linhas+=ax.plot([x1,x1],[y_low,y_high], linewidth=2.0, color='#f97316')
+        linhas+=ax.plot([x2,x2],[y_low,y_high], linewidth=2.0, color='#f97316')
         # horizontals
         y1=placed.y; y2=placed.y+placed.h
         x_low=max(fr.x, placed.x); x_high=min(fr.x+fr.w, placed.x+placed.w)
-        ax.plot([x_low,x_high],[y1,y1], linewidth=2.0, color='#f97316')
-        ax.plot([x_low,x_high],[y2,y2], linewidth=2.0, color='#f97316')
+        linhas+=ax.plot([x_low,x_high],[y1,y1], linewidth=2.0, color='#f97316')
+        linhas+=ax.plot([x_low,x_high],[y2,y2], linewidth=2.0, color='#f97316')
+    return linhas
 
 def _set_base(ax, titulo):
+    _,_,patches=_mpl()
     ax.set_xlim(0, PLACA_LARGURA); ax.set_ylim(0, PLACA_ALTURA)
     ax.set_aspect('equal'); ax.grid(True, alpha=0.25)
     ax.set_title(titulo, fontsize=12, fontweight='bold')
     ax.add_patch(patches.Rectangle((0,0), PLACA_LARGURA, PLACA_ALTURA, linewidth=2, edgecolor='black', facecolor='lightgray', alpha=0.2))
     ax.add_patch(patches.Rectangle((MARGEM,MARGEM), PLACA_LARGURA-2*MARGEM, PLACA_ALTURA-2*MARGEM, linewidth=1.5, edgecolor='#6b7280', facecolor='none', linestyle='--'))
 
-def _mr_draw_stage(plates:List[MRPlate], plate_idx:int, stage:str, destino:Path,
-                   placed:MRFreeRect=None, old_free:List[MRFreeRect]=None, new_free:List[MRFreeRect]=None):
-    # stage in {"pre","split","after"}
-    cols = len(plates)
-    fig, axes = plt.subplots(1, cols, figsize=(8*cols, 6))
-    if not isinstance(axes, (list, np.ndarray)): axes=[axes]
-    cmap=matplotlib.colormaps['Set3'].colors
-
-    for i,pl in enumerate(plates):
-        ax=axes[i]; _set_base(ax, f"Placa {i+1} — {stage.upper()}")
-        # peças já colocadas (pre/split não “preenchem” a nova peça)
-        for p in pl.placed:
-            ax.add_patch(patches.Rectangle((p.x,p.y), p.w, p.h, linewidth=2, edgecolor='black', facecolor=cmap[(p.id)%len(cmap)], alpha=0.85))
-            ax.text(p.x+p.w/2, p.y+p.h/2, f"P{p.id}", ha='center', va='center', fontsize=10, fontweight='bold')
-
-        # livres default (azul)
-        for fr in pl.free:
-            ax.add_patch(patches.Rectangle((fr.x,fr.y),fr.w,fr.h,linewidth=1.2,edgecolor='#0284c7',facecolor='none',linestyle=':'))
-
-        if i==plate_idx:
-            if stage=='pre':
-                # antigos livres em azul mais forte e cortes
-                if old_free:
-                    for fr in old_free:
-                        ax.add_patch(patches.Rectangle((fr.x,fr.y),fr.w,fr.h,linewidth=1.8,edgecolor='#0369a1',facecolor='none',linestyle='--'))
-                if placed:
-                    # contorno da peça a entrar (vermelho)
-                    ax.add_patch(patches.Rectangle((placed.x,placed.y),placed.w,placed.h,linewidth=3,edgecolor='#ef4444',facecolor='none'))
-                    # linhas de corte (laranja)
-                    _draw_cuts(ax, placed, old_free or [])
-            elif stage=='split':
-                # destaca deltas: removidos (magenta), novos (verde)
-                old_set = set(fr.as_tup() for fr in (old_free or []))
-                new_set = set(fr.as_tup() for fr in (new_free or []))
-                removed = old_set - new_set
-                added   = new_set - old_set
-                for (x,y,w,h) in removed:
-                    ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=2.2,edgecolor='#d946ef',facecolor='none',linestyle='-'))
-                for (x,y,w,h) in added:
-                    ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=2.2,edgecolor='#22c55e',facecolor='none',linestyle='-'))
-                if placed:
-                    ax.add_patch(patches.Rectangle((placed.x,placed.y),placed.w,placed.h,linewidth=2.5,edgecolor='#ef4444',facecolor='none'))
-            elif stage=='after':
-                # nada extra além do estado atual: peça já está desenhada em pl.placed
-                pass
-
-    destino.parent.mkdir(parents=True, exist_ok=True)
-    plt.tight_layout(); fig.savefig(str(destino), dpi=150, bbox_inches='tight'); plt.close(fig)
+# zorder dos patches: no desenho do zero a ordem de inclusão era base < peças < livres < destaques, e dentro
+# de peças e livres a ordem das listas da placa. As camadas fixas mais um passo por posição na lista (1e-6)
+# reproduzem exatamente essa ordem de desenho mesmo com artistas incluídos e removidos entre frames (a ordem
+# importa: contornos sobrepostos pintados em outra sequência diferem no arredondamento do antialiasing)
+_Z_PECA,_Z_LIVRE,_Z_DESTAQUE,_Z_TEXTO=1.01,1.02,1.03,3
+
+def _mr_instantaneo(plates:List[MRPlate])->List[Tuple[List[Tuple[int,...]],List[Tuple[int,...]]]]:
+    """Estado desenhável das placas: (peças (id,x,y,w,h), livres (x,y,w,h)) de cada uma."""
+    return [([(p.id,p.x,p.y,p.w,p.h) for p in pl.placed],[fr.as_tup() for fr in pl.free]) for pl in plates]
+
+class _MRStepRenderer:
+    """Desenha os frames pre/split/after reaproveitando a mesma figura: peças e livres ficam vivos entre os
+    frames e, a cada um, só entram/saem as peças e os livres que mudaram em relação ao último desenhado, mais
+    os destaques do estágio (removidos logo depois de salvar). A figura só é refeita quando muda o número de
+    placas. Como a sincronização é contra o frame anterior, os frames podem chegar em qualquer ordem (workers
+    do pool de desenho). Os zorders fixam a ordem de desenho, então cada PNG sai com os mesmos pixels de um
+    desenho do zero do mesmo frame."""
+    def __init__(self):
+        self.fig=None; self.axes=[]; self._pecas=[]; self._livres=[]; self._destaques=[]
+
+    def _montar(self,n:int):
+        matplotlib,plt,_=_mpl()
+        if self.fig is not None: plt.close(self.fig)
+        self.fig,axes=plt.subplots(1,n,figsize=(8*n,6),squeeze=False); self.axes=list(axes[0])
+        for ax in self.axes: _set_base(ax,"")
+        self._pecas=[{} for _ in range(n)]; self._livres=[{} for _ in range(n)]
+        self._cmap=matplotlib.colormaps['Set3'].colors; self._layout=True
+
+    def _sincronizar(self,i:int,pecas_pl:List[Tuple[int,...]],livres_pl:List[Tuple[int,...]]):
+        _,_,patches=_mpl(); ax=self.axes[i]; pecas=self._pecas[i]; livres=self._livres[i]; cmap=self._cmap
+        atuais=set(pecas_pl)
+        for t in [t for t in pecas if t not in atuais]:
+            for a in pecas.pop(t): a.remove()
+        for k,t in enumerate(pecas_pl):
+            if t not in pecas:
+                pid,x,y,w,h=t
+                pecas[t]=(ax.add_patch(patches.Rectangle((x,y), w, h, linewidth=2, edgecolor='black', facecolor=cmap[pid%len(cmap)], alpha=0.85)),
+                          ax.text(x+w/2, y+h/2, f"P{pid}", ha='center', va='center', fontsize=10, fontweight='bold'))
+            pecas[t][0].set_zorder(_Z_PECA+k*1e-6); pecas[t][1].set_zorder(_Z_TEXTO+k*1e-6)
+        atuais=set(livres_pl)
+        for t in [t for t in livres if t not in atuais]: livres.pop(t).remove()
+        for k,t in enumerate(livres_pl):
+            if t not in livres:
+                x,y,w,h=t; livres[t]=ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=1.2,edgecolor='#0284c7',facecolor='none',linestyle=':'))
+            livres[t].set_zorder(_Z_LIVRE+k*1e-6)
+
+    def draw(self,placas:List[Tuple[List[Tuple[int,...]],List[Tuple[int,...]]]], plate_idx:int, stage:str, destino:Path,
+             placed:MRFreeRect=None, old_free:List[MRFreeRect]=None, new_free:List[MRFreeRect]=None):
+        # placas = _mr_instantaneo(plates); stage in {"pre","split","after"}
+        _,plt,patches=_mpl()
+        if self.fig is None or len(self.axes)!=len(placas): self._montar(len(placas))
+        for i,(pecas_pl,livres_pl) in enumerate(placas):
+            self.axes[i].set_title(f"Placa {i+1} — {stage.upper()}", fontsize=12, fontweight='bold')
+            self._sincronizar(i,pecas_pl,livres_pl)
+        ax=self.axes[plate_idx]; d=self._destaques.append
+        if stage=='pre':
+            # antigos livres em azul mais forte e cortes
+            for fr in old_free or []:
+                d(ax.add_patch(patches.Rectangle((fr.x,fr.y),fr.w,fr.h,linewidth=1.8,edgecolor='#0369a1',facecolor='none',linestyle='--',zorder=_Z_DESTAQUE)))
+            if placed:
+                # contorno da peça a entrar (vermelho) e linhas de corte (laranja)
+                d(ax.add_patch(patches.Rectangle((placed.x,placed.y),placed.w,placed.h,linewidth=3,edgecolor='#ef4444',facecolor='none',zorder=_Z_DESTAQUE)))
+                for ln in _draw_cuts(ax, placed, old_free or []): d(ln)
+        elif stage=='split':
+            # destaca deltas: removidos (magenta), novos (verde)
+            old_set = set(fr.as_tup() for fr in (old_free or []))
+            new_set = set(fr.as_tup() for fr in (new_free or []))
+            for (x,y,w,h) in old_set-new_set:
+                d(ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=2.2,edgecolor='#d946ef',facecolor='none',linestyle='-',zorder=_Z_DESTAQUE)))
+            for (x,y,w,h) in new_set-old_set:
+                d(ax.add_patch(patches.Rectangle((x,y),w,h,linewidth=2.2,edgecolor='#22c55e',facecolor='none',linestyle='-',zorder=_Z_DESTAQUE)))
+            if placed:
+                d(ax.add_patch(patches.Rectangle((placed.x,placed.y),placed.w,placed.h,linewidth=2.5,edgecolor='#ef4444',facecolor='none',zorder=_Z_DESTAQUE)))
+        # 'after': nada extra além do estado atual, a peça já está entre as colocadas
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        if self._layout: self.fig.tight_layout(); self._layout=False
+        self.fig.savefig(str(destino), dpi=150, bbox_inches='tight')
+        for a in self._destaques: a.remove()
+        self._destaques=[]
+
+    def close(self):
+        if self.fig is not None: _mpl()[1].close(self.fig); self.fig=None
+
+_render_worker=None   # renderer de cada worker do pool de desenho (a figura vive entre os frames)
+
+def _mr_desenhar_frame(*args):
+    global _render_worker
+    if _render_worker is None: _render_worker=_MRStepRenderer()
+    _render_worker.draw(*args)
+
+class _FramesMR:
+    """Frames e passos JSON de uma execução desenhada do MaxRect, publicados em _pub_maxrect na ordem de envio.
+    Com o pool de desenho cada frame é uma tarefa assíncrona (com o instantâneo das placas naquele momento) e só
+    é publicado depois de estar no disco e de todos os anteriores; sem pool desenha aqui com um _MRStepRenderer."""
+    def __init__(self,png:bool,desenho:_PoolDesenho=None):
+        self._pool=desenho.obter() if png and desenho is not None else None
+        self._render=_MRStepRenderer() if png and self._pool is None else None
+        self._pendentes=deque()
+
+    def frame(self,plates:List[MRPlate], plate_idx:int, stage:str, destino:Path,
+              placed:MRFreeRect=None, old_free:List[MRFreeRect]=None, new_free:List[MRFreeRect]=None):
+        args=(_mr_instantaneo(plates),plate_idx,stage,destino,placed,old_free,new_free); _metricas_mr.renders_enviados+=1
+        if self._pool is None: self._render.draw(*args); _pub_maxrect.publicar(destino); _metricas_mr.renders_concluidos+=1
+        else: self._pendentes.append((destino,self._pool.apply_async(_mr_desenhar_frame,args))); self._publicar_prontos()
+
+    def arquivo(self,destino:Path):
+        # já gravado (passo JSON): entra na fila para sair depois dos frames anteriores
+        if self._pool is None: _pub_maxrect.publicar(destino)
+        else: self._pendentes.append((destino,None)); self._publicar_prontos()
+
+    def _publicar_prontos(self,esperar:bool=False):
+        while self._pendentes:
+            destino,res=self._pendentes[0]
+            if res is not None:
+                if not esperar and not res.ready(): return
+                res.get(); _metricas_mr.renders_concluidos+=1
+            self._pendentes.popleft(); _pub_maxrect.publicar(destino)
+
+    def close(self):
+        if self._render: self._render.close()
+        self._publicar_prontos(esperar=True)
 
 def _mr_info_lines(plates: List[MRPlate], elapsed: float)->str:
     total=len(plates)*PLACA_CUSTO + sum(p.laser_cost for p in plates)
@@ -761,7 +1866,7 @@ def _mr_info_lines(plates: List[MRPlate], elapsed: float)->str:
         linhas.append(f"Placa {i:02d}: Chapa R${PLACA_CUSTO:.2f} | Laser R${pl.laser_cost:.2f} | Total R${PLACA_CUSTO+pl.laser_cost:.2f}")
     return "\n".join(linhas)+"\n"
 
-def _mr_build_orders(pairs:List[Tuple[int,int]])->List[List[Tuple[int,int,int]]]:
+def _mr_build_orders(pairs:List[Tuple[int,int]], restarts:int=None)->List[List[Tuple[int,int,int]]]:
     base=[(w,h,i+1) for i,(w,h) in enumerate(pairs)]
     orders=[]
     orders.append(sorted(base, key=lambda t:t[0]*t[1], reverse=True))
@@ -769,14 +1874,20 @@ def _mr_build_orders(pairs:List[Tuple[int,int]])->List[List[Tuple[int,int,int]]]
     orders.append(sorted(base, key=lambda t:t[1], reverse=True))
     orders.append(sorted(base, key=lambda t:t[0], reverse=True))
     orders.append(sorted(base, key=lambda t:2*(t[0]+t[1]), reverse=True))
-    for _ in range(RAND_RESTARTS):
+    for _ in range(RAND_RESTARTS if restarts is None else restarts):
         tmp=base[:]; random.shuffle(tmp); orders.append(tmp)
     return orders
 
-def _mr_run(order:List[Tuple[int,int,int]], draw_steps:bool)->Tuple[List[MRPlate],float]:
-    plates=[MRPlate(0)]; t0=time.time(); step=0
+def _mr_run(order:List[Tuple[int,int,int]], draw_steps:bool, parada:_Parada=None,
+            desenho:_PoolDesenho=None)->Tuple[List[MRPlate],float]:
+    """As placas vêm de _pool_mr: quem descartar o resultado pode devolvê-las com devolver_todas. Se a `parada`
+    pedir para parar no meio do desenho (cancelamento ou orçamento), os frames PNG param e o resto sai só em JSON. Com `desenho` os frames vão
+    para o pool dele; sem, são desenhados aqui."""
+    plates=[_mr_nova_placa(0)]; t0=time.time(); step=0; met=_metricas_mr
+    frames=_FramesMR(SAIDA_PNG,desenho) if draw_steps else None; png=draw_steps and SAIDA_PNG
     for (w,h,pid) in order:
-        piece=MRPiece(w,h,pid)
+        if png and parada is not None and parada.parou(): png=False
+        piece=MRPiece(w,h,pid); met.colocacoes+=1; met.posicoes+=len(plates)+1
         # best em existentes
         best_tuple=(None, float('inf'), -1,-1, -1, -1)  # (score, laser, x,y,k, plate_idx)
         target_plate=-1
@@ -786,7 +1897,7 @@ def _mr_run(order:List[Tuple[int,int,int]], draw_steps:bool)->Tuple[List[MRPlate
             if (best_tuple[0] is None) or (score<best_tuple[0]):
                 best_tuple=(score,laser,x,y,k,pid_plate); target_plate=pid_plate
         # nova
-        new_pl=MRPlate(len(plates))
+        new_pl=_mr_nova_placa(len(plates))
         laser2,x2,y2,k2,score2=new_pl.best_position(piece)
         delta_exist = best_tuple[1] if best_tuple[0] is not None else float('inf')
         delta_new   = (laser2 + PLACA_CUSTO) if score2 is not None else float('inf')
@@ -795,46 +1906,125 @@ def _mr_run(order:List[Tuple[int,int,int]], draw_steps:bool)->Tuple[List[MRPlate
         if use_new:
             plates.append(new_pl); target_plate=len(plates)-1
             # PRE: antes de colocar na nova, livres são da nova placa (1 retângulo)
-            if draw_steps:
+            if png:
                 placed_rect=MRFreeRect(x2,y2,w,h)
-                _mr_draw_stage(plates, target_plate, "pre",   MAXRECT_DIR/f"step_{step:03d}_pre.png",   placed=placed_rect, old_free=[MRFreeRect(MARGEM,MARGEM, new_pl.W-2*MARGEM, new_pl.H-2*MARGEM)])
+                frames.frame(plates, target_plate, "pre",   MAXRECT_DIR/f"step_{step:03d}_pre.png",   placed=placed_rect, old_free=[MRFreeRect(MARGEM,MARGEM, new_pl.W-2*MARGEM, new_pl.H-2*MARGEM)])
             placed, old_free, new_free = new_pl.place_and_get_deltas(piece, x2,y2,k2, laser_inc=laser2)
-            if draw_steps:
-                _mr_draw_stage(plates, target_plate, "split", MAXRECT_DIR/f"step_{step:03d}_split.png", placed=placed, old_free=old_free, new_free=new_free)
-                _mr_draw_stage(plates, target_plate, "after", MAXRECT_DIR/f"step_{step:03d}_after.png")
+            if png:
+                frames.frame(plates, target_plate, "split", MAXRECT_DIR/f"step_{step:03d}_split.png", placed=placed, old_free=old_free, new_free=new_free)
+                frames.frame(plates, target_plate, "after", MAXRECT_DIR/f"step_{step:03d}_after.png")
         else:
+            _pool_mr.devolver(new_pl)
             if best_tuple[2] < 0:  # não coube (deveria ser raro)
                 continue
             pid_pl = best_tuple[5]; pl = plates[pid_pl]
             placed_rect=MRFreeRect(best_tuple[2],best_tuple[3],w,h)
-            if draw_steps:
-                _mr_draw_stage(plates, pid_pl, "pre", MAXRECT_DIR/f"step_{step:03d}_pre.png", placed=placed_rect, old_free=[MRFreeRect(r.x,r.y,r.w,r.h) for r in pl.free])
+            if png:
+                frames.frame(plates, pid_pl, "pre", MAXRECT_DIR/f"step_{step:03d}_pre.png", placed=placed_rect, old_free=[MRFreeRect(r.x,r.y,r.w,r.h) for r in pl.free])
             placed, old_free, new_free = pl.place_and_get_deltas(piece, best_tuple[2], best_tuple[3], best_tuple[4], laser_inc=best_tuple[1])
-            if draw_steps:
-                _mr_draw_stage(plates, pid_pl, "split", MAXRECT_DIR/f"step_{step:03d}_split.png", placed=placed, old_free=old_free, new_free=new_free)
-                _mr_draw_stage(plates, pid_pl, "after", MAXRECT_DIR/f"step_{step:03d}_after.png")
+            if png:
+                frames.frame(plates, pid_pl, "split", MAXRECT_DIR/f"step_{step:03d}_split.png", placed=placed, old_free=old_free, new_free=new_free)
+                frames.frame(plates, pid_pl, "after", MAXRECT_DIR/f"step_{step:03d}_after.png")
+        if draw_steps:
+            destino=MAXRECT_DIR/f"step_{step:03d}.json"
+            _gravar_json(destino,_mr_passo(step,target_plate,use_new,plates[target_plate],piece,old_free,new_free))
+            frames.arquivo(destino)
         step+=1
 
     total_cost=len(plates)*PLACA_CUSTO + sum(p.laser_cost for p in plates)
     elapsed=time.time()-t0
     if draw_steps:
+        frames.close()
+        _gravar_json(MAXRECT_DIR/"layout.json",_layout_mr(plates,total_cost,elapsed))
         (MAXRECT_DIR/"info.txt").write_text(_mr_info_lines(plates, elapsed), encoding='utf-8')
+        _pub_maxrect.publicar(MAXRECT_DIR/"info.txt")
     return plates, total_cost
 
-def maxrect_process(caminho_txt:Path):
-    # limpa frames
-    for f in MAXRECT_DIR.glob("*.png"):
-        try: f.unlink()
-        except: pass
-    pares=_parse_txt_content(caminho_txt.read_text(encoding='utf-8'))
-    orders=_mr_build_orders(pares)
-    # escolhe melhor ordem sem desenhar
-    best_cost=float('inf'); best_order=None
-    for order in orders:
-        plates,cost=_mr_run(order, draw_steps=False)
-        if cost<best_cost: best_cost=cost; best_order=order
+def _mr_cost(order:List[Tuple[int,int,int]])->float:
+    plates,cost=_mr_run(order, draw_steps=False)
+    _pool_mr.devolver_todas(plates); return cost
+
+def _mr_cost_contado(order:List[Tuple[int,int,int]])->Tuple[float,int,int]:
+    # _mr_cost para o pool: as colocações/posições contadas no worker voltam junto para as métricas do principal
+    met=_metricas_mr; c0,p0=met.colocacoes,met.posicoes; cost=_mr_cost(order)
+    return cost,met.colocacoes-c0,met.posicoes-p0
+
+def _mr_best_order(pares:List[Tuple[int,int]], restarts:int=None, processos:int=None,
+                   parada:_Parada=None)->Tuple[List[Tuple[int,int,int]],float]:
+    # escolhe melhor ordem sem desenhar. As ordens (e os embaralhamentos) são geradas aqui e os custos voltam
+    # na mesma sequência, então o vencedor é o mesmo da execução serial. Com `parada`, as ordens avaliadas entram
+    # em parada.iteracoes e a escolha fica com as que saíram antes da parada.
+    orders=_mr_build_orders(pares,restarts); processos=MR_PROCESSOS if processos is None else processos
+    best_cost=float('inf'); best_order=None; aval=0; met=_metricas_mr; met.total=len(orders)
+    pool=None
+    if processos>1 and len(orders)>1 and len(orders)*len(pares)>=MR_MIN_COLOCACOES_PARALELO:
+        n=min(processos,len(orders)); pool=_contexto_mp().Pool(n,initializer=_aplicar_config,initargs=(_config_worker(),))
+        costs=pool.imap(_mr_cost_contado,orders,chunksize=max(1,len(orders)//(4*n)))
+    else:
+        costs=((_mr_cost(o),0,0) for o in orders)   # aqui o próprio _mr_run já soma nas métricas
+    try:
+        for order,(cost,col,pos) in zip(orders,costs):
+            aval+=1; met.ordens+=1; met.folhas+=1; met.colocacoes+=col; met.posicoes+=pos
+            if cost<best_cost: best_cost=cost; best_order=order
+            if parada is not None and parada.parou(aval): break
+    finally:
+        if pool is not None: pool.terminate()
+    if parada is not None: parada.iteracoes+=aval
+    return best_order,best_cost
+
+def _mr_otimizar(order:List[Tuple[int,int,int]], cost:float, tempo_max:float=None, avaliacoes_max:int=None,
+                 ao_melhorar=None, seed=None, parada:_Parada=None)->Tuple[List[Tuple[int,int,int]],float,int]:
+    """Recozimento simulado sobre a ordem das peças, partindo de `order` (custo `cost`), com _mr_run sem
+    desenho como avaliação. Vizinhos: troca de duas peças, mover uma peça ou inverter um trecho. A
+    temperatura cai de MR_SA_T0 a MR_SA_TF conforme o orçamento (tempo e/ou avaliações) é consumido e a
+    busca para quando ele acaba (ou quando `parada` pede). ao_melhorar(ordem,custo,avaliacoes) a cada nova melhor.
+    Devolve (melhor ordem, custo, avaliações feitas)."""
+    n=len(order)
+    if n<2 or (not tempo_max and not avaliacoes_max): return order,cost,0
+    rng=random.Random(seed); t0=time.time(); aval=0; met=_metricas_mr
+    met.total=(met.total or 0)+avaliacoes_max if avaliacoes_max else None   # só com tempo não há total para o ETA
+    atual=list(order); c_atual=cost; melhor=atual; c_melhor=cost
+    while True:
+        frac=max((time.time()-t0)/tempo_max if tempo_max else 0.0, aval/avaliacoes_max if avaliacoes_max else 0.0)
+        if frac>=1.0 or (parada is not None and parada.parou(aval)): break
+        T=MR_SA_T0*(MR_SA_TF/MR_SA_T0)**frac
+        viz=atual[:]; i,j=sorted(rng.sample(range(n),2)); op=rng.random()
+        if op<1/3: viz[i],viz[j]=viz[j],viz[i]
+        elif op<2/3:
+            if rng.random()<0.5: viz.insert(j,viz.pop(i))
+            else: viz.insert(i,viz.pop(j))
+        else: viz[i:j+1]=viz[i:j+1][::-1]
+        c=_mr_cost(viz); aval+=1; met.ordens+=1; met.folhas+=1
+        if c<=c_atual or rng.random()<math.exp(-(c-c_atual)/T): atual,c_atual=viz,c
+        if c<c_melhor-1e-9:
+            melhor,c_melhor=viz,c
+            if ao_melhorar: ao_melhorar(melhor,c_melhor,aval)
+    if parada is not None: parada.iteracoes+=aval
+    return melhor,c_melhor,aval
+
+def maxrect_process(caminho_txt:Path, renderizar:bool=True, restarts:int=None, processos:int=None,
+                    tempo_otimizacao:float=None, avaliacoes:int=None, ao_melhorar=None, parada:_Parada=None)->float:
+    """Avalia as ordens de _mr_build_orders (restarts embaralhamentos, padrão RAND_RESTARTS) em `processos`
+    processos (padrão MR_PROCESSOS), refina a melhor com _mr_otimizar se houver orçamento (tempo_otimizacao,
+    padrão MR_OTIMIZAR_S, e/ou avaliacoes) e só a vencedora é refeita com o desenho passo a passo.
+    `parada` (_Parada) corta a avaliação e o refinamento; a melhor ordem até ali ainda é refeita, com os passos
+    só em JSON a partir da parada."""
+    if renderizar:
+        # limpa frames
+        _pub_maxrect.reiniciar()
+        for f in [*MAXRECT_DIR.glob("*.png"),*MAXRECT_DIR.glob("*.json")]:
+            try: f.unlink()
+            except: pass
+    pares=_parse_txt_content(caminho_txt.read_text(encoding='utf-8')); _metricas_mr.reiniciar('maxrect',len(pares))
+    best_order,best_cost=_mr_best_order(pares,restarts,processos,parada)
+    tempo_otimizacao=MR_OTIMIZAR_S if tempo_otimizacao is None else tempo_otimizacao
+    if best_order is not None and (tempo_otimizacao or avaliacoes) and not (parada is not None and parada.parou()):
+        best_order,best_cost,_=_mr_otimizar(best_order,best_cost,tempo_otimizacao,avaliacoes,ao_melhorar,parada=parada)
     # roda melhor ordem com desenho detalhado
-    if best_order is not None: _mr_run(best_order, draw_steps=True)
+    if renderizar and best_order is not None:
+        with _PoolDesenho() as desenho: _pool_mr.devolver_todas(_mr_run(best_order, draw_steps=True, parada=parada, desenho=desenho)[0])
+    _metricas_mr.terminar()
+    return best_cost
 
 # ============================================================
 # API
@@ -842,8 +2032,8 @@ def maxrect_process(caminho_txt:Path):
 class Api:
     def __init__(self):
         self.window=None
-        self._proc_lock=threading.Lock(); self._proc_running=False
-        self._mr_lock=threading.Lock();   self._mr_running=False
+        self._proc_lock=threading.Lock(); self._proc_running=False; self._proc_parada=None
+        self._mr_lock=threading.Lock();   self._mr_running=False;   self._mr_parada=None; self._mr_melhor=None
 
     def carregar_entrada_texto(self, conteudo:str):
         try:
@@ -853,59 +2043,107 @@ class Api:
         except Exception as e:
             return {"images":[], "error":str(e)}
 
-    def forca_bruta(self):
+    def forca_bruta(self, tempo_max:float=None, iteracoes_max:int=None):
+        """Roda o força bruta numa thread. tempo_max (s) e iteracoes_max (ordens) são orçamentos opcionais; ao
+        estourar, ou com cancelar_forca_bruta, a melhor solução até ali vira a 'solucao final'."""
         def _run():
             with self._proc_lock:
                 if self._proc_running: return
-                self._proc_running=True
+                self._proc_running=True; self._proc_parada=parada
             try:
                 if not _last_txt_path.exists(): return
-                forca_bruta_total(_last_txt_path)
+                stats=forca_bruta_total(_last_txt_path,parada=parada)
+                if 'interrompido' in stats: print(f"[PROCESSAR] interrompido ({stats['interrompido']}) no rank {stats['rank_parada']}")
+                if 'retomado_de' in stats: print(f"[PROCESSAR] retomado do checkpoint no rank {stats['retomado_de']}")
+                if 'nos_explorados' in stats: print(f"[PROCESSAR] nós explorados: {stats['nos_explorados']} | podados: {stats['nos_podados']} | ordens redundantes puladas: {stats['ordens_redundantes']}")
             except Exception as e:
                 print("[PROCESSAR] erro:", e)
             finally:
-                self._proc_running=False
+                self._proc_running=False; _metricas_bruto.terminar()
+        parada=_Parada(tempo_max or None,iteracoes_max or None)
         threading.Thread(target=_run,daemon=True).start()
         return {"status":"started"}
 
-    def get_solutions(self):
-        last,pen=_pick_last_two()
-        out={"processing":self._proc_running}
+    def cancelar_forca_bruta(self):
+        parada=self._proc_parada
+        if not self._proc_running or parada is None: return {"status":"idle"}
+        parada.cancelar(); return {"status":"stopping"}
+
+    def get_solutions(self, cursor:str=None):
+        """Os dois snapshots mais recentes. Com o `cursor` da resposta anterior: not_modified quando nada novo
+        foi publicado, e shift=True quando só chegou um (o 'atual' do cliente vira 'antiga' e só o novo vem)."""
+        cur,reset,novos=_pub_solucoes.desde(cursor)
+        out={"processing":self._proc_running,"cursor":cur}
+        if self._proc_running and self._proc_parada is not None and self._proc_parada.motivo: out['stopping']=self._proc_parada.motivo
+        if cursor is not None and not reset and not novos: out['not_modified']=True; return out
+        ultimos=_pub_solucoes.ultimos(2); last=ultimos[0] if ultimos else None; pen=ultimos[1] if len(ultimos)>1 else None
+        if cursor is not None and not reset and len(novos)==1: out['shift']=True; pen=None
         if last and last.exists():
-            d=_load_solution_dir(last); out['atual']={"images":d['images'],"info_text":d['info']}
+            d=_load_solution_dir(last); out['atual']={"images":d['images'],"info_text":d['info'],"layout":d['layout']}
         if pen and pen.exists():
-            d=_load_solution_dir(pen);  out['antiga']={"images":d['images'],"info_text":d['info']}
+            d=_load_solution_dir(pen);  out['antiga']={"images":d['images'],"info_text":d['info'],"layout":d['layout']}
         return out
 
-    def maxrect(self):
+    def maxrect(self, tempo_max:float=None, iteracoes_max:int=None):
+        """Roda o MaxRect numa thread, com os mesmos orçamentos opcionais do forca_bruta (iterações = ordens
+        avaliadas); parado, desenha a melhor ordem encontrada até ali. As melhorias do recozimento aparecem em
+        get_maxrect ('melhor') enquanto ele roda."""
+        def _melhorou(ordem,custo,aval):
+            self._mr_melhor={"custo":round(custo,2),"avaliacoes":aval,"ordem":[pid for _,_,pid in ordem]}
         def _run():
             with self._mr_lock:
                 if self._mr_running: return
-                self._mr_running=True
+                self._mr_running=True; self._mr_parada=parada; self._mr_melhor=None
             try:
                 if not _last_txt_path.exists(): return
-                maxrect_process(_last_txt_path)
+                maxrect_process(_last_txt_path,ao_melhorar=_melhorou,parada=parada)
+                if parada.motivo: print(f"[MAXRECT] interrompido ({parada.motivo}) após {parada.iteracoes} ordens")
             except Exception as e:
                 print("[MAXRECT] erro:", e)
             finally:
-                self._mr_running=False
+                self._mr_running=False; _metricas_mr.terminar()
+        parada=_Parada(tempo_max or None,iteracoes_max or None)
         threading.Thread(target=_run,daemon=True).start()
         return {"status":"started"}
 
-    def get_maxrect(self):
-        # lê TODOS PNGs (pre/split/after/final) ordenados por nome
-        files=sorted(MAXRECT_DIR.glob("*.png"))
-        imgs=[]
-        for f in files:
+    def cancelar_maxrect(self):
+        parada=self._mr_parada
+        if not self._mr_running or parada is None: return {"status":"idle"}
+        parada.cancelar(); return {"status":"stopping"}
+
+    def get_maxrect(self, cursor:str=None):
+        """Frames na ordem em que foram gravados. Sem cursor (ou com um de outra execução) vêm todos e
+        reset=True; com o cursor da resposta anterior só os novos, ou not_modified. Sem SAIDA_PNG não há frames:
+        vêm os passos JSON ('passos', ver _mr_passo) e a página desenha os três estágios de cada um. Durante o
+        recozimento 'melhor' traz a melhor ordem até agora (custo, avaliações e ids das peças)."""
+        cur,reset,novos=_pub_maxrect.desde(cursor)
+        out={"processing":self._mr_running,"cursor":cur}
+        if self._mr_running and self._mr_parada is not None and self._mr_parada.motivo: out['stopping']=self._mr_parada.motivo
+        if self._mr_running and self._mr_melhor is not None: out['melhor']=self._mr_melhor
+        if cursor is not None and not reset and not novos: out['not_modified']=True; return out
+        imgs=[]; passos=[]
+        for f in novos:
             try:
-                b64=base64.b64encode(f.read_bytes()).decode('ascii')
-                imgs.append(f"data:image/png;base64,{b64}")
+                if f.suffix=='.png':
+                    b64=base64.b64encode(f.read_bytes()).decode('ascii')
+                    imgs.append(f"data:image/png;base64,{b64}")
+                elif f.suffix=='.json' and not SAIDA_PNG: passos.append(json.loads(f.read_text(encoding='utf-8')))
             except: pass
         info=(MAXRECT_DIR/"info.txt").read_text(encoding='utf-8') if (MAXRECT_DIR/"info.txt").exists() else ""
-        return {"processing":self._mr_running, "after":{"images":imgs,"info_text":info}}
+        out['reset']=reset; out['after']={"images":imgs,"info_text":info}
+        if passos: out['after']['passos']=passos; out['dimensoes']=[PLACA_LARGURA,PLACA_ALTURA,MARGEM]
+        return out
+
+    def get_stats(self):
+        """Contadores ao vivo da execução atual (ou da última) de cada motor, com taxa e ETA (ver _Metricas), e
+        os do cache de soluções. Só lê atributos: pode ser chamado a qualquer momento, no ritmo do polling."""
+        return {"bruto":dict(_metricas_bruto.resumo(),processing=self._proc_running),
+                "maxrect":dict(_metricas_mr.resumo(),processing=self._mr_running),
+                "cache_solucoes":_cache_solucoes.contadores()}
 
 # ============================================================
 if __name__=="__main__":
+    import webview
     api=Api()
     win=webview.create_window("Corte de Placas - Interface", html=pagina_html, width=1920, height=1080, js_api=api)
     api.window=win
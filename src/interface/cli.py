@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Execução sem interface gráfica dos motores de corte.
+
+  python src/interface/cli.py bruto entrada.txt --sem-render
+  python src/interface/cli.py maxrect entrada.txt --sem-render --json layout.json
+  python src/interface/cli.py bruto entrada.txt --modo dfs --processos 4
+  python src/interface/cli.py bruto entrada.txt --sem-render --faixa 2/8 --json parte2.json
+
+Com --sem-render nada é desenhado: matplotlib e webview nem chegam a ser importados, e a solução é
+impressa (ou gravada em JSON). Sem a opção, as pastas de saída são gravadas como na interface.
+O força bruta grava checkpoints e, interrompido, continua de onde parou na próxima execução com a mesma entrada.
+--faixa K/M (ou --de/--ate) resolve só a K-ésima de M faixas de ordens: rodando as M em máquinas separadas, a
+melhor das M soluções é a da busca completa.
+"""
+import sys, json, time, argparse
+from pathlib import Path
+from typing import Dict
+
+_t0=time.perf_counter()
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+import app
+TEMPO_IMPORTACAO=time.perf_counter()-_t0
+
+def _texto(layout:Dict)->str:
+    """Texto do layout de app._layout_placas / app._layout_mr (o mesmo formato do layout.json)."""
+    placas=layout['placas']; chapa=layout['chapa']
+    linhas=[f"Placas: {len(placas)}",f"Custo: R${layout['custo']:.2f}",f"Tempo: {layout['tempo']:.3f}s"]
+    for i,pl in enumerate(placas,start=1):
+        linhas.append("")
+        linhas.append(f"Placa {i:02d}: Chapa R${chapa:.2f} | Laser R${pl['laser']:.2f} | Total R${chapa+pl['laser']:.2f}")
+        for pid,x,y,w,h in pl['pecas']: linhas.append(f"  P{pid}: {w}×{h} em ({x},{y})")
+    return "\n".join(linhas)
+
+def main():
+    ap=argparse.ArgumentParser(description="Corte de placas sem interface gráfica.")
+    ap.add_argument("motor", choices=["bruto","maxrect"], help="bruto = forca_bruta_total | maxrect = maxrect_process")
+    ap.add_argument("entrada", type=Path, help="arquivo .txt (N e depois N linhas 'largura altura')")
+    ap.add_argument("--sem-render", action="store_true", help="não desenha nada (nem importa matplotlib)")
+    ap.add_argument("--json", type=Path, metavar="SAIDA", help="grava o layout da solução em JSON")
+    ap.add_argument("--modo", choices=["bb","dfs","permutacoes"], help="modo do força bruta (padrão MODO_BRUTO)")
+    ap.add_argument("--processos", type=int, help="processos da busca (padrão BRUTO_PROCESSOS / MR_PROCESSOS)")
+    ap.add_argument("--restarts", type=int, help="ordens aleatórias do maxrect (padrão RAND_RESTARTS)")
+    ap.add_argument("--otimizar", type=float, metavar="SEG", help="segundos de recozimento simulado no maxrect")
+    ap.add_argument("--avaliacoes", type=int, help="limite de ordens avaliadas pelo recozimento do maxrect")
+    ap.add_argument("--faixa", metavar="K/M", help="força bruta só na K-ésima de M faixas de ordens")
+    ap.add_argument("--de", type=int, default=0, metavar="RANK", help="primeiro rank (ordem lexicográfica) do força bruta")
+    ap.add_argument("--ate", type=int, metavar="RANK", help="rank final (exclusivo) do força bruta")
+    ap.add_argument("--sem-checkpoint", action="store_true", help="não grava nem retoma checkpoint do força bruta")
+    ap.add_argument("--tempo-max", type=float, metavar="SEG", help="para a busca depois de SEG segundos (fica a melhor até ali)")
+    ap.add_argument("--iteracoes", type=int, metavar="N", help="para a busca depois de N ordens avaliadas")
+    ap.add_argument("--tempos", action="store_true", help="mostra o tempo de importação e de execução")
+    args=ap.parse_args()
+    if not args.entrada.exists(): ap.error(f"arquivo '{args.entrada}' não encontrado")
+    renderizar=not args.sem_render
+
+    t0=time.time(); parada=app._Parada(args.tempo_max,args.iteracoes) if args.tempo_max or args.iteracoes else None
+    def _melhorou(ordem,custo,aval):
+        print(f"[MAXRECT] nova melhor: R${custo:.2f} ({aval} avaliações, {time.time()-t0:.1f}s)", file=sys.stderr)
+    try:
+        if args.motor=="bruto":
+            inicio,fim=args.de,args.ate
+            if args.faixa:
+                try: k,m=map(int,args.faixa.split('/')); assert 1<=k<=m
+                except (ValueError,AssertionError): ap.error("--faixa deve ser K/M com 1 <= K <= M")
+                n=len(app._parse_txt_content(args.entrada.read_text(encoding='utf-8')))
+                inicio,fim=app.faixa_de_ranks(n,k,m)
+            stats=app.forca_bruta_total(args.entrada,modo=args.modo,processos=args.processos,renderizar=renderizar,
+                                        inicio=inicio,fim=fim,checkpoint=not args.sem_checkpoint,parada=parada)
+            if 'retomado_de' in stats: print(f"[BRUTO] retomado do checkpoint no rank {stats['retomado_de']}", file=sys.stderr)
+            layout=lambda t: app._layout_placas(stats['melhor_placas'],stats['melhor_custo'],t)
+        elif renderizar:
+            custo=app.maxrect_process(args.entrada,restarts=args.restarts,processos=args.processos,
+                                      tempo_otimizacao=args.otimizar,avaliacoes=args.avaliacoes,ao_melhorar=_melhorou,parada=parada)
+            layout=None; print(f"Custo: R${custo:.2f}\nPassos em {app.MAXRECT_DIR}")
+        else:
+            pares=app._parse_txt_content(args.entrada.read_text(encoding='utf-8'))
+            ordem,custo=app._mr_best_order(pares,args.restarts,args.processos,parada)
+            if ordem is not None and (args.otimizar or args.avaliacoes) and not (parada and parada.parou()):
+                ordem,custo,_=app._mr_otimizar(ordem,custo,args.otimizar,args.avaliacoes,_melhorou,parada=parada)
+            plates=app._mr_run(ordem,draw_steps=False)[0] if ordem else []
+            layout=lambda t: app._layout_mr(plates,custo,t)
+    except ValueError as e:
+        ap.exit(2,f"erro: {e}\n")
+    tempo=time.time()-t0
+    if parada and parada.motivo: print(f"[PARADA] {parada.motivo}: fica a melhor solução encontrada até aqui", file=sys.stderr)
+
+    if layout is not None:
+        layout=layout(tempo)
+        if args.json: args.json.write_text(json.dumps(layout,ensure_ascii=False),encoding='utf-8')
+        else: print(_texto(layout))
+        if renderizar: print(f"Solução em {app.OUTPUT_DIR/'solucao final'}")
+    if args.tempos:
+        print(f"importação: {TEMPO_IMPORTACAO*1000:.1f} ms | execução: {tempo:.3f}s", file=sys.stderr)
+
+if __name__=="__main__":
+    main()
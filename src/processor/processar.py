@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from itertools import permutations
@@ -11,6 +12,8 @@ PLACA_ALTURA = 300
 MARGEM = 10  # cm - margem mínima obrigatória
 LASER_CUSTO_POR_CM = 0.01  # R$ por cm de corte
 PLACA_CUSTO = 1000.0  # R$ por placa
+USAR_CANDIDATOS = True  # True = testa só pontos âncora; False = varre toda a área útil
+MODO_BRUTO = 'bb'  # 'bb' = branch-and-bound; 'permutacoes' = avalia todas as n! ordens, uma a uma
 
 class Peca:
     def __init__(self, largura, altura, id):
@@ -23,19 +26,108 @@ class Peca:
     def __repr__(self):
         return f"Peça {self.id}: {self.largura}x{self.altura}"
 
+class OcupacaoSAT:
+    """
+    Grade de ocupação baseada em NumPy com tabela de somas acumuladas
+    (summed-area table).
+
+    sat[i][j] guarda o número de células ocupadas no retângulo [0,i) x [0,j),
+    então a quantidade de células ocupadas em qualquer retângulo sai de
+    4 leituras, em tempo constante, não importa o tamanho da peça.
+    """
+    def __init__(self, largura, altura):
+        self.largura = largura
+        self.altura = altura
+        self.grid = np.zeros((altura, largura), dtype=np.bool_)
+        self.sat = np.zeros((altura + 1, largura + 1), dtype=np.int32)
+    
+    def contar(self, x, y, largura, altura):
+        """Número de células ocupadas no retângulo (x, y, largura, altura)."""
+        s = self.sat
+        return int(s[y + altura, x + largura] - s[y, x + largura] - s[y + altura, x] + s[y, x])
+    
+    def livre(self, x, y, largura, altura):
+        return self.contar(x, y, largura, altura) == 0
+    
+    def marcar(self, x, y, largura, altura):
+        """
+        Marca o retângulo como ocupado e atualiza a tabela.
+        O retângulo deve estar livre (peças nunca se sobrepõem).
+        """
+        self.grid[y:y + altura, x:x + largura] = True
+        # Cada sat[i][j] ganha a área de interseção do retângulo com [0,i) x [0,j)
+        linhas = np.minimum(np.arange(1, self.altura - y + 1), altura)
+        colunas = np.minimum(np.arange(1, self.largura - x + 1), largura)
+        self.sat[y + 1:, x + 1:] += np.outer(linhas, colunas).astype(np.int32)
+    
+    def area_ocupada(self):
+        return int(self.sat[self.altura, self.largura])
+    
+    def zerar(self, retangulos):
+        """
+        Volta ao estado vazio sem alocar nada novo.
+        
+        Só são zeradas as células dos retângulos ocupados e, na tabela, o
+        trecho [y_min+1:, x_min+1:], que é o único alterado por eles.
+        """
+        if not retangulos:
+            return
+        for x, y, largura, altura in retangulos:
+            self.grid[y:y + altura, x:x + largura] = False
+        x_min = min(r[0] for r in retangulos)
+        y_min = min(r[1] for r in retangulos)
+        self.sat[y_min + 1:, x_min + 1:] = 0
+    
+    def copiar_de(self, outra):
+        """Copia o conteúdo de outra ocupação para os arrays já alocados."""
+        np.copyto(self.grid, outra.grid)
+        np.copyto(self.sat, outra.sat)
+    
+    def copia(self):
+        nova = OcupacaoSAT.__new__(OcupacaoSAT)
+        nova.largura = self.largura
+        nova.altura = self.altura
+        nova.grid = self.grid.copy()
+        nova.sat = self.sat.copy()
+        return nova
+
 class Placa:
     def __init__(self):
         self.largura = PLACA_LARGURA
         self.altura = PLACA_ALTURA
-        self.ocupacao = [[False for _ in range(self.largura)] for _ in range(self.altura)]
+        self.ocupacao = OcupacaoSAT(self.largura, self.altura)
         self.pecas = []
+        # Coordenadas das arestas das peças colocadas (base dos pontos âncora)
+        self.bordas_x = set()
+        self.bordas_y = set()
     
     def limpar(self):
-        self.ocupacao = [[False for _ in range(self.largura)] for _ in range(self.altura)]
+        """Esvazia a placa reaproveitando a grade (só as regiões ocupadas são zeradas)."""
+        self.ocupacao.zerar([(p.x, p.y, p.largura, p.altura) for p in self.pecas])
         self.pecas = []
+        self.bordas_x.clear()
+        self.bordas_y.clear()
+    
+    def copiar_de(self, outra):
+        """Torna esta placa igual a `outra`, sem alocar uma grade nova."""
+        self.ocupacao.copiar_de(outra.ocupacao)
+        self.pecas = outra.pecas[:]
+        self.bordas_x = set(outra.bordas_x)
+        self.bordas_y = set(outra.bordas_y)
     
     def area_livre(self):
-        return sum(row.count(False) for row in self.ocupacao)
+        return self.largura * self.altura - self.ocupacao.area_ocupada()
+    
+    def copia(self):
+        """Cópia independente da placa (ocupação, peças e arestas)."""
+        nova = Placa.__new__(Placa)
+        nova.largura = self.largura
+        nova.altura = self.altura
+        nova.ocupacao = self.ocupacao.copia()
+        nova.pecas = self.pecas[:]
+        nova.bordas_x = set(self.bordas_x)
+        nova.bordas_y = set(self.bordas_y)
+        return nova
     
     def verificar_espaco(self, x, y, largura, altura):
         """
@@ -53,18 +145,12 @@ class Placa:
         if x + largura > x_max or y + altura > y_max:
             return False
         
-        # Verificar colisão com peças já colocadas
-        for i in range(y, y + altura):
-            for j in range(x, x + largura):
-                if self.ocupacao[i][j]:
-                    return False
-        return True
+        # Verificar colisão com peças já colocadas (O(1) pela tabela de somas)
+        return self.ocupacao.livre(x, y, largura, altura)
     
     def ocupar_espaco(self, x, y, largura, altura):
         """Marca o espaço como ocupado."""
-        for i in range(y, y + altura):
-            for j in range(x, x + largura):
-                self.ocupacao[i][j] = True
+        self.ocupacao.marcar(x, y, largura, altura)
     
     def calcular_custo_posicao(self, x, y, largura, altura):
         """
@@ -81,29 +167,24 @@ class Placa:
         # Calcular bordas compartilhadas com peças adjacentes
         compartilhado = 0
         
+        # Cada borda é uma faixa de 1 célula ao redor da peça: consulta O(1) na tabela
+        ocupacao = self.ocupacao
+        
         # Borda superior (y-1)
         if y > 0:
-            for j in range(x, x + largura):
-                if self.ocupacao[y - 1][j]:
-                    compartilhado += 1
+            compartilhado += ocupacao.contar(x, y - 1, largura, 1)
         
         # Borda inferior (y + altura)
         if y + altura < self.altura:
-            for j in range(x, x + largura):
-                if self.ocupacao[y + altura][j]:
-                    compartilhado += 1
+            compartilhado += ocupacao.contar(x, y + altura, largura, 1)
         
         # Borda esquerda (x-1)
         if x > 0:
-            for i in range(y, y + altura):
-                if self.ocupacao[i][x - 1]:
-                    compartilhado += 1
+            compartilhado += ocupacao.contar(x - 1, y, 1, altura)
         
         # Borda direita (x + largura)
         if x + largura < self.largura:
-            for i in range(y, y + altura):
-                if self.ocupacao[i][x + largura]:
-                    compartilhado += 1
+            compartilhado += ocupacao.contar(x + largura, y, 1, altura)
         
         # Comprimento real de corte = perímetro - bordas compartilhadas
         comprimento_corte = perimetro - compartilhado
@@ -111,17 +192,51 @@ class Placa:
         # Custo em R$
         return comprimento_corte * LASER_CUSTO_POR_CM
     
+    def pontos_ancora(self, largura, altura):
+        """
+        Gera as coordenadas candidatas (xs, ys) para uma peça largura x altura.
+        
+        Para cada aresta e de peça já colocada entram e e e-largura (em x) e
+        e e e-altura (em y), além dos limites da margem. Entre esses pontos o
+        custo varia linearmente e a viabilidade não muda, então a primeira
+        posição de menor custo da varredura completa está sempre em xs x ys.
+        """
+        x_min = MARGEM
+        x_max = self.largura - MARGEM - largura
+        y_min = MARGEM
+        y_max = self.altura - MARGEM - altura
+        
+        xs = {x_min, x_max}
+        for e in self.bordas_x:
+            xs.add(e)
+            xs.add(e - largura)
+        ys = {y_min, y_max}
+        for e in self.bordas_y:
+            ys.add(e)
+            ys.add(e - altura)
+        
+        xs = sorted(x for x in xs if x_min <= x <= x_max)
+        ys = sorted(y for y in ys if y_min <= y <= y_max)
+        return xs, ys
+    
     def encontrar_melhor_posicao(self, peca):
         """
         Encontra a melhor posição (x, y) para uma peça nesta placa.
         Retorna (custo_em_reais, x, y)
         """
+        if USAR_CANDIDATOS:
+            xs, ys = self.pontos_ancora(peca.largura, peca.altura)
+        else:
+            # Iterar dentro da área útil (respeitando margem)
+            xs = range(MARGEM, self.largura - MARGEM - peca.largura + 1)
+            ys = range(MARGEM, self.altura - MARGEM - peca.altura + 1)
+        
         melhor_custo = float('inf')
         melhor_x, melhor_y = -1, -1
         
-        # Iterar dentro da área útil (respeitando margem)
-        for y in range(MARGEM, self.altura - MARGEM - peca.altura + 1):
-            for x in range(MARGEM, self.largura - MARGEM - peca.largura + 1):
+        # Mesma ordem (linha a linha) nos dois modos: empates resolvidos igual
+        for y in ys:
+            for x in xs:
                 if self.verificar_espaco(x, y, peca.largura, peca.altura):
                     custo = self.calcular_custo_posicao(x, y, peca.largura, peca.altura)
                     if custo < melhor_custo:
@@ -139,6 +254,33 @@ class Placa:
         peca.y = y
         self.ocupar_espaco(x, y, peca.largura, peca.altura)
         self.pecas.append(peca)
+        self.bordas_x.update((x, x + peca.largura))
+        self.bordas_y.update((y, y + peca.altura))
+
+class PoolPlacas:
+    """
+    Reaproveita placas em vez de alocar uma grade 300x300 nova a cada
+    placa aberta (ou copiada) durante a busca.
+    
+    Placas devolvidas são limpas com Placa.limpar. Só devolva placas que
+    não fazem parte de nenhuma solução guardada.
+    """
+    def __init__(self):
+        self.livres = []
+    
+    def obter(self):
+        if self.livres:
+            return self.livres.pop()
+        return Placa()
+    
+    def obter_copia(self, placa):
+        nova = self.obter()
+        nova.copiar_de(placa)
+        return nova
+    
+    def devolver(self, placa):
+        placa.limpar()
+        self.livres.append(placa)
 
 def ler_arquivo_pecas(caminho_arquivo):
     """Lê o arquivo com as especificações das peças."""
@@ -212,6 +354,56 @@ def salvar_solucao_em_pasta(placas, pasta, custo_total, tempo_segundos):
 
     print(f"✓ Solução salva em: {pasta}")
 
+_cache_placa_vazia = {}
+
+def melhor_posicao_placa_vazia(largura, altura):
+    """
+    Melhor posição (custo, x, y) de uma peça largura x altura numa placa nova.
+    
+    O resultado só depende das dimensões da peça e da placa configurada
+    (tamanho, margem e preço do laser, que entram na chave), então cada
+    tamanho é calculado uma única vez e reaproveitado por todas as ordens.
+    """
+    chave = (largura, altura, PLACA_LARGURA, PLACA_ALTURA, MARGEM, LASER_CUSTO_POR_CM)
+    if chave not in _cache_placa_vazia:
+        _cache_placa_vazia[chave] = Placa().encontrar_melhor_posicao(Peca(largura, altura, 0))
+    return _cache_placa_vazia[chave]
+
+def escolher_posicao(placas, peca):
+    """
+    Decide onde a peça entra, dado o estado atual das placas.
+    
+    Retorna (custo_incremental, custo_laser, indice_placa, x, y).
+    indice_placa == len(placas) significa abrir uma placa nova.
+    Se a peça não cabe em lugar nenhum, o custo é infinito.
+    """
+    melhor_custo_global = float('inf')
+    melhor_acao = None
+    
+    # 1. Tentar colocar em placas existentes
+    for idx, placa in enumerate(placas):
+        custo_pos, x, y = placa.encontrar_melhor_posicao(peca)
+        if custo_pos < melhor_custo_global:
+            melhor_custo_global = custo_pos
+            melhor_acao = (idx, x, y)
+    
+    # 2. Tentar colocar em uma nova placa (resultado memorizado por tamanho)
+    custo_nova_pos, x_nova, y_nova = melhor_posicao_placa_vazia(peca.largura, peca.altura)
+    
+    # 3. Verificar se a peça cabe em algum lugar
+    if custo_nova_pos == float('inf') and melhor_custo_global == float('inf'):
+        return float('inf'), float('inf'), -1, -1, -1  # Peça não cabe nem sozinha
+    
+    # 4. Comparar: usar placa existente vs. criar nova placa
+    # Custo de criar nova placa = R$1000 (placa) + custo de corte
+    custo_opcao_nova = PLACA_CUSTO + custo_nova_pos if custo_nova_pos != float('inf') else float('inf')
+    
+    if custo_opcao_nova < melhor_custo_global:
+        return custo_opcao_nova, custo_nova_pos, len(placas), x_nova, y_nova
+    
+    idx, x, y = melhor_acao
+    return melhor_custo_global, melhor_custo_global, idx, x, y
+
 def calcular_solucao(pecas_ordenadas):
     """
     Calcula o custo REAL para uma ordem específica de peças.
@@ -222,44 +414,187 @@ def calcular_solucao(pecas_ordenadas):
     custo_total = PLACA_CUSTO  # Primeira placa já custa R$1000
     
     for peca in pecas_ordenadas:
-        melhor_custo_global = float('inf')
-        melhor_acao = None
-        
-        # 1. Tentar colocar em placas existentes
-        for idx, placa in enumerate(placas):
-            custo_pos, x, y = placa.encontrar_melhor_posicao(peca)
-            if custo_pos < melhor_custo_global:
-                melhor_custo_global = custo_pos
-                melhor_acao = ('existente', idx, custo_pos, x, y)
-        
-        # 2. Tentar colocar em uma nova placa
-        placa_teste = Placa()
-        custo_nova_pos, x_nova, y_nova = placa_teste.encontrar_melhor_posicao(peca)
-        
-        # 3. Verificar se a peça cabe em algum lugar
-        if custo_nova_pos == float('inf') and melhor_custo_global == float('inf'):
-            return [], float('inf')  # Peça não cabe nem sozinha
+        custo, _, idx, x, y = escolher_posicao(placas, peca)
         
-        # 4. Comparar: usar placa existente vs. criar nova placa
-        # Custo de criar nova placa = R$1000 (placa) + custo de corte
-        custo_opcao_nova = PLACA_CUSTO + custo_nova_pos if custo_nova_pos != float('inf') else float('inf')
+        if custo == float('inf'):
+            return [], float('inf')
         
-        if custo_opcao_nova < melhor_custo_global:
+        if idx == len(placas):
             # Criar nova placa
-            nova_placa = Placa()
-            nova_placa.colocar_peca(peca, x_nova, y_nova)
-            placas.append(nova_placa)
-            custo_total += PLACA_CUSTO + custo_nova_pos
-        else:
-            # Usar placa existente
-            _, idx, custo_pos, x, y = melhor_acao
-            placas[idx].colocar_peca(peca, x, y)
-            custo_total += custo_pos
+            placas.append(Placa())
+        placas[idx].colocar_peca(peca, x, y)
+        custo_total += custo
     
     return placas, custo_total
 
-def forca_bruta(arquivo_entrada):
-    """Algoritmo de força bruta que testa todas as permutações."""
+def area_util():
+    """Área útil de uma placa (sem a margem), com as dimensões atuais."""
+    return (PLACA_LARGURA - 2 * MARGEM) * (PLACA_ALTURA - 2 * MARGEM)
+
+def cota_inferior(area_restante, perimetro_restante, area_livre, perimetro_exposto, area_placa):
+    """
+    Limite inferior (admissível) do custo que as peças restantes ainda vão somar.
+    
+    - Chapas: a área que não cabe no espaço livre das placas abertas
+      obriga a abrir placas novas.
+    - Laser: cada cm de borda compartilhada consome perímetro de uma peça
+      restante e de outra peça. Contra as peças já colocadas só existem
+      `perimetro_exposto` cm livres, então o corte restante é no mínimo
+      (perimetro_restante - perimetro_exposto) / 2.
+    
+    area_placa é a área útil de uma placa nova (area_util()).
+    """
+    excesso = area_restante - area_livre
+    placas_novas = max(0, -(-excesso // area_placa))
+    corte = max(0, perimetro_restante - perimetro_exposto) / 2
+    return placas_novas * PLACA_CUSTO + corte * LASER_CUSTO_POR_CM
+
+def branch_and_bound(pecas_originais, ao_melhorar=None):
+    """
+    Branch-and-bound sobre as ordens das peças.
+    
+    As ordens são montadas peça a peça, na mesma ordem lexicográfica de
+    permutations(). Um prefixo é podado quando custo parcial + cota inferior
+    passa do melhor custo já encontrado; como só são descartadas ordens que
+    não podem melhorar, o ótimo (e a sequência de melhorias) é o mesmo da
+    enumeração completa.
+    
+    ao_melhorar(placas, custo, ordem, folhas) é chamado a cada nova melhor solução.
+    Retorna (melhor_placas, melhor_custo, melhor_ordem, estatisticas).
+    """
+    n = len(pecas_originais)
+    usados = [False] * n
+    ordem = []
+    pool = PoolPlacas()
+    placas = [pool.obter()]
+    area_placa = area_util()
+    estatisticas = {'nos_explorados': 0, 'nos_podados': 0, 'folhas': 0}
+    melhor = {'custo': float('inf'), 'placas': [], 'ordem': None}
+    
+    def explorar(custo, corte, area_livre, perimetro_colocado, area_restante, perimetro_restante):
+        if len(ordem) == n:
+            estatisticas['folhas'] += 1
+            if custo < melhor['custo']:
+                melhor['custo'] = custo
+                melhor['placas'] = list(placas)
+                melhor['ordem'] = tuple(ordem)
+                if ao_melhorar:
+                    ao_melhorar(melhor['placas'], custo, melhor['ordem'], estatisticas['folhas'])
+            return
+        
+        for i in range(n):
+            if usados[i]:
+                continue
+            original = pecas_originais[i]
+            peca = Peca(original.largura, original.altura, original.id)
+            custo_peca, custo_laser, idx, x, y = escolher_posicao(placas, peca)
+            estatisticas['nos_explorados'] += 1
+            if custo_peca == float('inf'):
+                estatisticas['nos_podados'] += 1
+                continue
+            
+            # Atualiza os acumulados usados pela cota
+            area = peca.largura * peca.altura
+            perimetro = 2 * (peca.largura + peca.altura)
+            novo_corte = corte + int(round(custo_laser / LASER_CUSTO_POR_CM))
+            novo_perimetro_colocado = perimetro_colocado + perimetro
+            nova_area_livre = area_livre - area + (area_placa if idx == len(placas) else 0)
+            exposto = 2 * novo_corte - novo_perimetro_colocado
+            
+            # Folga: empates (e ruído de ponto flutuante) são decididos na folha
+            cota = cota_inferior(area_restante - area, perimetro_restante - perimetro, nova_area_livre, exposto, area_placa)
+            if custo + custo_peca + cota > melhor['custo'] + 1e-6:
+                estatisticas['nos_podados'] += 1
+                continue
+            
+            # A placa alterada é trocada por uma cópia, então as soluções
+            # guardadas continuam apontando para as versões antigas
+            if idx == len(placas):
+                placa = pool.obter()
+                placas.append(placa)
+                antiga = None
+            else:
+                antiga = placas[idx]
+                placa = pool.obter_copia(antiga)
+                placas[idx] = placa
+            placa.colocar_peca(peca, x, y)
+            usados[i] = True
+            ordem.append(i)
+            
+            explorar(custo + custo_peca, novo_corte, nova_area_livre, novo_perimetro_colocado,
+                     area_restante - area, perimetro_restante - perimetro)
+            
+            # Desfaz (a placa volta ao pool, a menos que esteja na melhor solução)
+            ordem.pop()
+            usados[i] = False
+            if antiga is None:
+                placas.pop()
+            else:
+                placas[idx] = antiga
+            if not any(placa is p for p in melhor['placas']):
+                pool.devolver(placa)
+    
+    if n > 0:
+        explorar(PLACA_CUSTO, 0, area_placa, 0,
+                 sum(p.largura * p.altura for p in pecas_originais),
+                 sum(2 * (p.largura + p.altura) for p in pecas_originais))
+    
+    return melhor['placas'], melhor['custo'], melhor['ordem'], estatisticas
+
+def numero_permutacao(ordem):
+    """Posição (1-based) da ordem na sequência de permutations(range(n))."""
+    n = len(ordem)
+    restantes = sorted(ordem)
+    numero = 0
+    for pos, i in enumerate(ordem):
+        k = restantes.index(i)
+        numero += k * math.factorial(n - 1 - pos)
+        restantes.pop(k)
+    return numero + 1
+
+def enumerar_permutacoes(pecas_originais, ao_melhorar=None, ao_avaliar=None):
+    """
+    Enumeração completa: calcula o layout de cada uma das n! ordens, na
+    sequência de permutations(). Mesma interface do branch_and_bound;
+    ao_avaliar(contador, ordem, melhor_custo) é chamado a cada ordem avaliada.
+    """
+    n = len(pecas_originais)
+    estatisticas = {'nos_explorados': 0, 'nos_podados': 0, 'folhas': 0}
+    melhor_custo = float('inf')
+    melhor_solucao = []
+    melhor_ordem = None
+    
+    for ordem in permutations(range(n)):
+        estatisticas['folhas'] += 1
+        pecas_ordenadas = [
+            Peca(pecas_originais[i].largura,
+                 pecas_originais[i].altura,
+                 pecas_originais[i].id)
+            for i in ordem
+        ]
+        placas, custo = calcular_solucao(pecas_ordenadas)
+        
+        if custo < melhor_custo:
+            melhor_custo = custo
+            melhor_solucao = placas
+            melhor_ordem = ordem
+            if ao_melhorar:
+                ao_melhorar(placas, custo, ordem, estatisticas['folhas'])
+        if ao_avaliar:
+            ao_avaliar(estatisticas['folhas'], ordem, melhor_custo)
+    
+    return melhor_solucao, melhor_custo, melhor_ordem, estatisticas
+
+def forca_bruta(arquivo_entrada, modo=None):
+    """
+    Algoritmo de força bruta que testa todas as permutações.
+    
+    modo (padrão MODO_BRUTO): 'bb' poda as ordens que não podem melhorar;
+    'permutacoes' avalia e reporta cada uma das n! ordens.
+    """
+    modo = modo or MODO_BRUTO
+    if modo not in ('bb', 'permutacoes'):
+        raise ValueError(f"modo desconhecido: {modo!r} (use 'bb' ou 'permutacoes')")
     print("\n" + "="*60)
     print("🔧 ALGORITMO DE FORÇA BRUTA - CORTE DE PLACAS")
     print("   (Sem rotação, com margem de 10cm, custo real)")
@@ -286,46 +621,39 @@ def forca_bruta(arquivo_entrada):
     total_permutacoes = math.factorial(num_pecas)
     print(f"\n📊 Total de permutações a testar: {total_permutacoes}")
     
-    melhor_custo = float('inf')
-    melhor_solucao = None
-    melhor_ordem = None
-    contador = 0
     tempo_inicio = time.time()
     
-    print("\n🔄 Processando permutações...")
+    if modo == 'bb':
+        print("\n🔄 Processando (branch-and-bound)...")
+    else:
+        print("\n🔄 Processando permutações...")
     
-    for ordem in permutations(range(num_pecas)):
-        contador += 1
-        print(f"\n🔄 permutação #{contador}: {[pecas_originais[i].id for i in ordem]}")
-
-        pecas_ordenadas = [
-            Peca(pecas_originais[i].largura, 
-                 pecas_originais[i].altura, 
-                 pecas_originais[i].id)
-            for i in ordem
-        ]
-        placas, custo = calcular_solucao(pecas_ordenadas)
+    def nova_melhor(placas, custo, ordem, folha):
+        tempo_decorrido = time.time() - tempo_inicio
+        contador = numero_permutacao(ordem)
         
-        if custo < melhor_custo:
-            melhor_custo = custo
-            melhor_solucao = placas
-            melhor_ordem = ordem
-            tempo_decorrido = time.time() - tempo_inicio
-            
-            print(f"\n✨ NOVA MELHOR SOLUÇÃO!")
-            print(f"   • Permutação #{contador}")
-            print(f"   • Ordem ID: {[pecas_originais[i].id for i in ordem]}")
-            print(f"   • Custo: R$ {custo:.2f}")
-            print(f"   • Placas: {len(placas)}")
-            print(f"   • Tempo: {tempo_decorrido:.3f}s")
-            
-            pasta = os.path.join('output', f'solucao # {contador}')
-            salvar_solucao_em_pasta(placas, pasta, custo, tempo_decorrido)
+        print(f"\n✨ NOVA MELHOR SOLUÇÃO!")
+        print(f"   • Permutação #{contador}")
+        print(f"   • Ordem ID: {[pecas_originais[i].id for i in ordem]}")
+        print(f"   • Custo: R$ {custo:.2f}")
+        print(f"   • Placas: {len(placas)}")
+        print(f"   • Tempo: {tempo_decorrido:.3f}s")
         
+        pasta = os.path.join('output', f'solucao # {contador}')
+        salvar_solucao_em_pasta(placas, pasta, custo, tempo_decorrido)
+    
+    def avaliada(contador, ordem, melhor_custo):
+        print(f"\n🔄 permutação #{contador}: {[pecas_originais[i].id for i in ordem]}")
         if contador % 100 == 0 or contador == total_permutacoes:
             tempo_decorrido = time.time() - tempo_inicio
             print(f"   [{contador}/{total_permutacoes}] Tempo: {tempo_decorrido:.2f}s | Melhor: R$ {melhor_custo:.2f}")
     
+    if modo == 'bb':
+        melhor_solucao, melhor_custo, melhor_ordem, estatisticas = branch_and_bound(pecas_originais, nova_melhor)
+    else:
+        melhor_solucao, melhor_custo, melhor_ordem, estatisticas = enumerar_permutacoes(pecas_originais, nova_melhor, avaliada)
+    contador = estatisticas['folhas']
+    
     tempo_total = time.time() - tempo_inicio
     
     print("\n" + "="*60)
@@ -337,7 +665,9 @@ def forca_bruta(arquivo_entrada):
         print(f"   • Custo total: R$ {melhor_custo:.2f}")
         print(f"   • Ordem: {[pecas_originais[i].id for i in melhor_ordem]}")
         print(f"   • Placas: {len(melhor_solucao)}")
-        print(f"   • Permutações testadas: {contador}")
+        print(f"   • Ordens completas avaliadas: {contador} de {total_permutacoes}")
+        if modo == 'bb':
+            print(f"   • Nós explorados: {estatisticas['nos_explorados']} | podados: {estatisticas['nos_podados']}")
         print(f"   • Tempo: {tempo_total:.3f}s")
         
         pasta_final = os.path.join('output', 'solucao final')
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+for pasta in ("interface", "processor"):
+    sys.path.insert(0, str(RAIZ / "src" / pasta))
@@ -0,0 +1,97 @@
+"""Busca de posição numa placa: as âncoras das bordas (candidatos) e a busca NumPy (vetorial), nos dois backends
+de ocupação, devolvem o mesmo (custo, x, y) da varredura completa, inclusive no desempate linha a linha."""
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+import app
+
+# placa reduzida: a varredura de referência testa toda a área útil em cada consulta
+LARGURA, ALTURA = 120, 90
+SEMENTES = range(8)
+
+
+def _layout(semente):
+    """Peças em posições aleatórias (buracos irregulares) e encostadas pela própria varredura (bordas
+    compartilhadas), e as peças consultadas depois."""
+    rng = random.Random(semente)
+    placa = app.Placa()
+    colocadas = []
+    for k in range(rng.randint(2, 7)):
+        p = app.Peca(rng.randint(5, 40), rng.randint(5, 35), k + 1)
+        if rng.random() < 0.5:
+            x = rng.randint(app.MARGEM, LARGURA - app.MARGEM - p.largura)
+            y = rng.randint(app.MARGEM, ALTURA - app.MARGEM - p.altura)
+            if not placa.verificar_espaco(x, y, p.largura, p.altura):
+                continue
+        else:
+            c, x, y = placa._melhor_posicao_varredura(p)
+            if c == float("inf"):
+                continue
+        placa.colocar(p, x, y)
+        colocadas.append((p.largura, p.altura, x, y))
+    consultas = [(rng.randint(3, 45), rng.randint(3, 40)) for _ in range(6)]
+    return colocadas, consultas
+
+
+def _montar(placa, colocadas):
+    for i, (w, h, x, y) in enumerate(colocadas):
+        placa.colocar(app.Peca(w, h, i + 1), x, y)
+    return placa
+
+
+@pytest.fixture
+def placa_pequena(monkeypatch):
+    monkeypatch.setattr(app, "PLACA_LARGURA", LARGURA)
+    monkeypatch.setattr(app, "PLACA_ALTURA", ALTURA)
+
+
+@pytest.mark.parametrize("backend", ["bits", "sat"])
+@pytest.mark.parametrize("busca", ["candidatos", "vetorial", "varredura"])
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_busca_igual_a_varredura(monkeypatch, placa_pequena, semente, busca, backend):
+    # referência: varredura sobre o backend de bits
+    monkeypatch.setattr(app, "OCUPACAO_BACKEND", "bits")
+    colocadas, consultas = _layout(semente)
+    referencia = _montar(app.Placa(), colocadas)
+    esperado = [referencia._melhor_posicao_varredura(app.Peca(w, h, 0)) for w, h in consultas]
+
+    monkeypatch.setattr(app, "OCUPACAO_BACKEND", backend)
+    monkeypatch.setattr(app, "BUSCA_POSICAO", busca)
+    placa = _montar(app.Placa(), colocadas)
+    assert [placa.melhor_posicao(app.Peca(w, h, 0)) for w, h in consultas] == esperado
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_processar_candidatos_igual_a_varredura(monkeypatch, placa_pequena, semente):
+    processar = pytest.importorskip("processar")
+    monkeypatch.setattr(processar, "PLACA_LARGURA", LARGURA)
+    monkeypatch.setattr(processar, "PLACA_ALTURA", ALTURA)
+    colocadas, consultas = _layout(semente)
+    placa = processar.Placa()
+    for i, (w, h, x, y) in enumerate(colocadas):
+        placa.colocar_peca(processar.Peca(w, h, i + 1), x, y)
+    resultados = []
+    for candidatos in (True, False):
+        monkeypatch.setattr(processar, "USAR_CANDIDATOS", candidatos)
+        resultados.append([placa.encontrar_melhor_posicao(processar.Peca(w, h, 0)) for w, h in consultas])
+    assert resultados[0] == resultados[1]
+
+
+def test_cache_placa_vazia_acompanha_a_placa(monkeypatch):
+    w, h = 150, 90
+    app._posicao_placa_vazia(w, h)   # calculada com a placa padrão
+    for nome, valor in (("PLACA_LARGURA", LARGURA), ("MARGEM", 5), ("LASER_CUSTO_POR_CM", 0.02)):
+        monkeypatch.setattr(app, nome, valor)
+        assert app._posicao_placa_vazia(w, h) == app.Placa().melhor_posicao(app.Peca(w, h, 0))
+
+
+def test_processar_cache_placa_vazia_acompanha_a_placa(monkeypatch):
+    processar = pytest.importorskip("processar")
+    w, h = 150, 90
+    processar.melhor_posicao_placa_vazia(w, h)
+    for nome, valor in (("PLACA_LARGURA", LARGURA), ("MARGEM", 5), ("LASER_CUSTO_POR_CM", 0.02)):
+        monkeypatch.setattr(processar, nome, valor)
+        esperado = processar.Placa().encontrar_melhor_posicao(processar.Peca(w, h, 0))
+        assert processar.melhor_posicao_placa_vazia(w, h) == esperado
@@ -0,0 +1,109 @@
+"""Checkpoint e faixas de ranks: uma busca parada por orçamento retoma do checkpoint (cada shard do paralelo do
+seu próprio rank) e chega ao ótimo da execução inteira, e as partes de faixa_de_ranks juntas também."""
+import json
+import math
+
+import pytest
+
+import app
+from test_forca_bruta import _entrada, _pedido
+
+N = 7
+
+
+@pytest.fixture
+def pedido(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "CHECKPOINT_DIR", tmp_path / "checkpoints")
+    monkeypatch.setattr(app, "CHECKPOINT_S", 3600.0)   # só o checkpoint da parada é gravado
+    pares = _pedido(3, repetidas=False, n=N)
+    return _entrada(monkeypatch, tmp_path, pares), pares
+
+
+def _resultado(stats):
+    return stats["melhor_custo"], app._layout_placas(stats["melhor_placas"], stats["melhor_custo"], 0.0)
+
+
+def _rodar(entrada, processos=1, parada=None, **faixa):
+    return app.forca_bruta_total(entrada, modo="bb", processos=processos, renderizar=False, parada=parada, **faixa)
+
+
+def _checkpoint(tmp_path):
+    arquivos = list((tmp_path / "checkpoints").glob("*.json"))
+    assert len(arquivos) == 1
+    return json.loads(arquivos[0].read_text(encoding="utf-8"))
+
+
+def test_serial_retoma_do_checkpoint(pedido, tmp_path):
+    entrada, _ = pedido
+    completo = _resultado(app.forca_bruta_total(entrada, modo="bb", processos=1, renderizar=False, checkpoint=False))
+    parado = _rodar(entrada, parada=app._Parada(iteracoes_max=20))
+    assert parado["interrompido"] == "iteracoes"
+    ck = _checkpoint(tmp_path)
+    assert ck["pendentes"] == [[parado["rank_parada"], math.factorial(N)]]
+    retomado = _rodar(entrada)
+    assert retomado["retomado_de"] == parado["rank_parada"]
+    assert _resultado(retomado) == completo
+    assert not list((tmp_path / "checkpoints").glob("*.json"))   # terminou: checkpoint apagado
+
+
+def test_paralelo_retoma_do_checkpoint(monkeypatch, pedido, tmp_path):
+    monkeypatch.setattr(app, "BRUTO_MIN_ORDENS_PARALELO", 0)
+    entrada, _ = pedido
+    completo = _resultado(app.forca_bruta_total(entrada, modo="bb", processos=1, renderizar=False, checkpoint=False))
+    parada = app._Parada(iteracoes_max=1)   # estoura na primeira consulta do processo principal
+    parado = _rodar(entrada, processos=2, parada=parada)
+    assert parada.motivo == "iteracoes"
+    pendentes = [tuple(f) for f in _checkpoint(tmp_path)["pendentes"]]
+    assert pendentes == parado["pendentes"] and pendentes[0][0] == parado["rank_parada"]
+    assert all(a < b <= c for (a, b), (c, _) in zip(pendentes, pendentes[1:] + [(math.factorial(N), None)]))
+    retomado = _rodar(entrada, processos=2)
+    assert retomado["retomado_de"] == parado["rank_parada"]
+    assert _resultado(retomado) == completo
+
+
+def test_paralelo_resolve_so_as_faixas():
+    # faixas cortando os blocos das peças iniciais, como as que sobram de shards parados em ranks diferentes
+    pecas = [(w, h, i + 1) for i, (w, h) in enumerate(_pedido(5, repetidas=False, n=N))]
+    faixas = [(100, 900), (1500, 2400), (4000, 5040)]
+    esperado = float("inf"), None
+    for a, b in faixas:
+        for ordem in app._permutacoes_faixa(N, a, b):
+            custo = app._calcular_solucao([app.Peca(*pecas[i]) for i in ordem])[1]
+            if custo < esperado[0]:
+                esperado = custo, ordem
+    melhorias = []
+    placas, custo, stats = app._bb_paralelo(pecas, 2, faixas, ao_melhorar=lambda pl, c, o: melhorias.append(tuple(o)))
+    assert (custo, melhorias[-1]) == esperado
+    assert "pendentes" not in stats
+
+
+@pytest.mark.parametrize("partes", [2, 3])
+def test_faixas_juntas_igual_a_execucao_inteira(pedido, partes):
+    entrada, _ = pedido
+    completo = _resultado(_rodar(entrada, checkpoint=False))
+    resultados = []
+    for parte in range(1, partes + 1):
+        inicio, fim = app.faixa_de_ranks(N, parte, partes)
+        stats = _rodar(entrada, inicio=inicio, fim=fim, checkpoint=False)
+        if stats["melhor_placas"]:
+            resultados.append(_resultado(stats))
+    # o melhor entre as partes (a primeira em caso de empate, como na enumeração) é o da execução inteira
+    assert min(resultados, key=lambda r: r[0]) == completo
+
+
+def test_cli_faixa_e_de_ate(monkeypatch, pedido, tmp_path):
+    cli = pytest.importorskip("cli")
+    entrada, _ = pedido
+
+    def _cli(*opcoes):
+        saida = tmp_path / "parte.json"
+        monkeypatch.setattr("sys.argv", ["cli.py", "bruto", str(entrada), "--sem-render", "--processos", "1",
+                                         "--sem-checkpoint", "--json", str(saida), *opcoes])
+        cli.main()
+        layout = json.loads(saida.read_text(encoding="utf-8"))
+        return layout["custo"], layout["placas"]
+
+    completo = _cli()
+    meio = math.factorial(N) // 2
+    assert min([_cli("--faixa", "1/2"), _cli("--faixa", "2/2")], key=lambda r: r[0]) == completo
+    assert min([_cli("--ate", str(meio)), _cli("--de", str(meio))], key=lambda r: r[0]) == completo
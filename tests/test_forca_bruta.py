@@ -0,0 +1,123 @@
+"""Branch-and-bound (com poda e só as permutações distintas) contra a enumeração completa: em pedidos pequenos e
+aleatórios os dois modos chegam ao mesmo custo e ao mesmo layout, inclusive com peças repetidas."""
+import math
+import random
+
+import pytest
+
+import app
+
+SEMENTES = range(6)
+
+
+def _pedido(semente, repetidas, n=6):
+    rng = random.Random(semente)
+    if repetidas:
+        tipos = [(rng.randint(40, 160), rng.randint(40, 160)) for _ in range(3)]
+        return [rng.choice(tipos) for _ in range(n)]
+    return [(rng.randint(30, 180), rng.randint(30, 180)) for _ in range(n)]
+
+
+def _entrada(monkeypatch, tmp_path, pares):
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path / "output")
+    entrada = tmp_path / "pecas.txt"
+    entrada.write_text(f"{len(pares)}\n" + "\n".join(f"{w} {h}" for w, h in pares), encoding="utf-8")
+    return entrada
+
+
+def _resolver(monkeypatch, tmp_path, pares, modo):
+    entrada = _entrada(monkeypatch, tmp_path, pares)
+    stats = app.forca_bruta_total(entrada, modo=modo, processos=1, renderizar=False, checkpoint=False)
+    return stats["melhor_custo"], app._layout_placas(stats["melhor_placas"], stats["melhor_custo"], 0.0)
+
+
+@pytest.mark.parametrize("repetidas", [False, True], ids=["distintas", "repetidas"])
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_bb_igual_a_enumeracao(monkeypatch, tmp_path, semente, repetidas):
+    pares = _pedido(semente, repetidas)
+    custo_bb, layout_bb = _resolver(monkeypatch, tmp_path, pares, "bb")
+    custo_enum, layout_enum = _resolver(monkeypatch, tmp_path, pares, "permutacoes")
+    assert custo_bb == custo_enum
+    assert layout_bb == layout_enum
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_bb_com_placa_trocada_depois_do_import(monkeypatch, tmp_path, semente):
+    # a cota usa a área útil das dimensões atuais (com a do import ela superestima as placas novas), e o cache
+    # de placa vazia e o pool de placas não podem devolver posições/grades da placa de 300×300
+    monkeypatch.setattr(app, "PLACA_LARGURA", 500)
+    monkeypatch.setattr(app, "PLACA_ALTURA", 400)
+    rng = random.Random(semente)
+    pares = [(rng.randint(100, 260), rng.randint(80, 220)) for _ in range(6)]
+    assert _resolver(monkeypatch, tmp_path, pares, "bb") == _resolver(monkeypatch, tmp_path, pares, "permutacoes")
+
+
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_distintas_igual_a_todas_as_ordens(semente):
+    pecas = [(w, h, i + 1) for i, (w, h) in enumerate(_pedido(semente, repetidas=True))]
+    resultados = []
+    for distintas in (True, False):
+        melhorias = []
+        placas, custo, stats = app._bb_buscar(pecas, ao_melhorar=lambda pl, c, o: melhorias.append((c, o)), distintas=distintas)
+        resultados.append((custo, app._layout_placas(placas, custo, 0.0), melhorias))
+    assert resultados[0] == resultados[1]
+
+
+@pytest.mark.parametrize("placa", [None, (500, 400)], ids=["padrao", "trocada"])
+@pytest.mark.parametrize("semente", SEMENTES)
+def test_processar_bb_igual_a_enumeracao(monkeypatch, semente, placa):
+    processar = pytest.importorskip("processar")   # a enumeração do script é mais lenta: 5 peças bastam
+    pares = _pedido(semente, repetidas=False, n=5)
+    if placa:
+        monkeypatch.setattr(processar, "PLACA_LARGURA", placa[0])
+        monkeypatch.setattr(processar, "PLACA_ALTURA", placa[1])
+        rng = random.Random(semente)
+        pares = [(rng.randint(100, 260), rng.randint(80, 220)) for _ in range(5)]
+    pecas = [processar.Peca(w, h, i + 1) for i, (w, h) in enumerate(pares)]
+    placas_bb, custo_bb, ordem_bb, _ = processar.branch_and_bound(pecas)
+    placas_enum, custo_enum, ordem_enum, _ = processar.enumerar_permutacoes(pecas)
+    assert custo_bb == custo_enum
+    assert ordem_bb == ordem_enum
+    assert [[(p.id, p.x, p.y) for p in pl.pecas] for pl in placas_bb] == [[(p.id, p.x, p.y) for p in pl.pecas] for pl in placas_enum]
+
+
+def test_metricas_paralelo_somam_o_principal(monkeypatch, tmp_path):
+    # cada colocação dos shards é um nó explorado; as do layout refeito no principal somam por cima
+    monkeypatch.setattr(app, "BRUTO_MIN_ORDENS_PARALELO", 0)
+    principal = []
+    calcular = app._calcular_solucao
+
+    def _calcular(pecas):
+        antes = app._metricas_bruto.colocacoes
+        r = calcular(pecas)
+        principal.append(app._metricas_bruto.colocacoes - antes)
+        return r
+
+    monkeypatch.setattr(app, "_calcular_solucao", _calcular)
+    entrada = _entrada(monkeypatch, tmp_path, _pedido(0, repetidas=False, n=5))
+    stats = app.forca_bruta_total(entrada, modo="bb", processos=2, renderizar=False, checkpoint=False)
+    met = app._metricas_bruto
+    assert principal and met.folhas == stats["folhas"]
+    assert met.colocacoes == stats["nos_explorados"] + sum(principal)
+
+
+@pytest.mark.parametrize("repetidas", [False, True], ids=["distintas", "repetidas"])
+@pytest.mark.parametrize("semente", range(3))
+def test_paralelo_publica_as_melhorias_da_serial(semente, repetidas):
+    pecas = [(w, h, i + 1) for i, (w, h) in enumerate(_pedido(semente, repetidas, n=7))]
+    sequencias = []
+    for buscar in (lambda cb: app._bb_buscar(pecas, ao_melhorar=cb), lambda cb: app._bb_paralelo(pecas, 2, ao_melhorar=cb)):
+        melhorias = []
+        buscar(lambda pl, c, o: melhorias.append((c, tuple(o))))
+        sequencias.append(melhorias)
+    assert sequencias[0] == sequencias[1]
+
+
+def test_paralelo_publica_antes_do_primeiro_shard_terminar():
+    # cancelada na primeira melhoria recebida, a busca para ainda dentro do shard 0 (ranks < (n-1)!)
+    n = 9
+    pecas = [(w, h, i + 1) for i, (w, h) in enumerate(_pedido(9, repetidas=False, n=n))]
+    parada = app._Parada()
+    placas, custo, stats = app._bb_paralelo(pecas, 2, ao_melhorar=lambda pl, c, o: parada.cancelar(), parada=parada)
+    assert placas and parada.motivo == "cancelado"
+    assert stats["rank_parada"] < math.factorial(n - 1)
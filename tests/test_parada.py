@@ -0,0 +1,28 @@
+"""Parada por orçamento (não só por cancelamento) também corta o desenho: nenhum PNG novo começa depois dela."""
+import pytest
+
+pytest.importorskip("matplotlib")
+import app
+
+ORDEM = [(200, 150, 1), (120, 90, 2), (60, 60, 3)]
+
+
+def _estourada():
+    parada = app._Parada(iteracoes_max=1)
+    parada.iteracoes = 1
+    return parada
+
+
+def test_solucao_sem_png_depois_do_orcamento(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SAIDA_PNG", True)
+    placas, custo = app._calcular_solucao([app.Peca(w, h, pid) for w, h, pid in ORDEM])
+    app._salvar_solucao(tmp_path, placas, custo, 0.0, parada=_estourada())
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["info.txt", "layout.json"]
+
+
+def test_passos_mr_so_em_json_depois_do_orcamento(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "MAXRECT_DIR", tmp_path)
+    monkeypatch.setattr(app, "SAIDA_PNG", True)
+    app._pool_mr.devolver_todas(app._mr_run(ORDEM, draw_steps=True, parada=_estourada())[0])
+    assert not list(tmp_path.glob("*.png"))
+    assert len(list(tmp_path.glob("step_*.json"))) == len(ORDEM)
@@ -0,0 +1,44 @@
+"""Registro de publicações (_Publicacoes): o que já estava no disco e o que foi publicado antes da primeira
+leitura aparecem uma vez só, e os cursores continuam válidos depois de aparar."""
+from pathlib import Path
+
+import app
+
+
+def _pastas(*nums):
+    return [Path(f"solucao # {n}") for n in nums]
+
+
+def test_publicado_antes_da_primeira_leitura_nao_duplica():
+    disco = _pastas(1, 2, 3)
+    pub = app._Publicacoes(lambda: disco)
+    pub.publicar(disco[-1])   # gravado (e portanto já no disco) antes de alguém ler
+    cursor, reset, itens = pub.desde(None)
+    assert reset and itens == disco and cursor == "0:3"
+    pub.publicar(Path("solucao # 4"))
+    assert pub.desde(cursor) == ("0:4", False, _pastas(4))
+
+
+def test_aparar_depois_de_carregar():
+    disco = _pastas(1, 2, 3, 4)
+    pub = app._Publicacoes(lambda: disco, manter=2)
+    pub.publicar(disco[2])
+    pub.publicar(disco[3])
+    pub.publicar(Path("solucao # 5"))
+    cursor, reset, itens = pub.desde(None)
+    assert reset and itens == _pastas(4, 5) and cursor == "0:5"
+    assert pub.ultimos(2) == _pastas(5, 4)
+    pub.publicar(Path("solucao # 6"))
+    assert pub.desde(cursor) == ("0:6", False, _pastas(6))
+    assert pub.desde("0:2")[1]   # mais antigo que os mantidos: reset
+
+
+def test_proximo_indice_relista_o_disco(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(app, "_pub_solucoes", app._Publicacoes(app._solucoes_no_disco, manter=2))
+    assert app._next_solution_index() == 1
+    (tmp_path / "solucao # 2").mkdir()
+    app._pub_solucoes.publicar(tmp_path / "solucao # 2")
+    assert app._next_solution_index() == 3
+    (tmp_path / "solucao # 7").mkdir()   # gravada por outro processo depois da primeira leitura
+    assert app._next_solution_index() == 8
@@ -0,0 +1,46 @@
+"""Frames do MaxRect: a figura reaproveitada pelo _MRStepRenderer (na thread ou nos workers do pool de desenho,
+que recebem os frames fora de ordem) grava os mesmos pixels de um desenho do zero para cada frame."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+import matplotlib.image as mpimg
+
+import app
+
+ORDEM = [(200, 150, 1), (120, 90, 2), (60, 60, 3), (250, 200, 4), (80, 40, 5), (100, 100, 6)]
+
+
+def _rodar_com_frames(monkeypatch, tmp_path, processos):
+    """Roda o _mr_run desenhado e devolve, para cada frame, o instantâneo e os argumentos enviados."""
+    monkeypatch.setattr(app, "MAXRECT_DIR", tmp_path)
+    monkeypatch.setattr(app, "SAIDA_PNG", True)
+    monkeypatch.setattr(app, "RENDER_PROCESSOS", processos)
+    pedidos = []
+    original = app._FramesMR.frame
+
+    def frame(self, plates, *args, **kw):
+        pedidos.append((app._mr_instantaneo(plates), args, kw))
+        return original(self, plates, *args, **kw)
+
+    monkeypatch.setattr(app._FramesMR, "frame", frame)
+    with app._PoolDesenho() as desenho:
+        app._pool_mr.devolver_todas(app._mr_run(ORDEM, draw_steps=True, desenho=desenho)[0])
+    return pedidos
+
+
+def _conferir(pedidos, ref):
+    assert len(pedidos) == 3 * len(ORDEM)
+    for placas, (plate_idx, stage, destino), kw in pedidos:
+        r = app._MRStepRenderer()
+        try:
+            r.draw(placas, plate_idx, stage, ref / destino.name, **kw)
+        finally:
+            r.close()
+        assert np.array_equal(mpimg.imread(destino), mpimg.imread(ref / destino.name)), destino.name
+
+
+@pytest.mark.parametrize("processos", [1, 2], ids=["serial", "pool"])
+def test_figura_reaproveitada_igual_ao_desenho_do_zero(monkeypatch, tmp_path, processos):
+    pedidos = _rodar_com_frames(monkeypatch, tmp_path, processos)
+    _conferir(pedidos, tmp_path / "ref")